@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.urls import reverse
 from django.test import TestCase, Client
 from http import HTTPStatus
@@ -5,6 +6,7 @@ from http import HTTPStatus
 
 class AboutTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_about_uses_correct_templates(self):
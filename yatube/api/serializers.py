@@ -0,0 +1,24 @@
+"""Компактные представления моделей для JSON API."""
+from posts.models import IMAGE_READY
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        # Необработанный оригинал с EXIF не отдается.
+        'image': (
+            post.image.url
+            if post.image and post.image_status == IMAGE_READY else None),
+    }
+
+
+def serialize_page(page, serializer):
+    return {
+        'results': [serializer(obj) for obj in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
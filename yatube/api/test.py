@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from http import HTTPStatus
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import POSTS_ON_PAGE
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='')
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group)
+
+    def test_feeds_return_serialized_posts(self):
+        """Ленты отдают компактные посты."""
+        urls = (
+            reverse('api:index'),
+            reverse('api:group', args=(self.group.slug,)),
+            reverse('api:profile', args=(self.author.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.guest_client.get(url).json()
+                self.assertEqual(data['results'], [{
+                    'id': self.post.pk,
+                    'text': 'Пост',
+                    'pub_date': self.post.pub_date.isoformat(),
+                    'author': 'author',
+                    'group': 'group',
+                    'image': None,
+                }])
+                self.assertIsNone(data['next_cursor'])
+
+    def test_cursor_pagination(self):
+        """Следующая страница запрашивается по курсору."""
+        for _ in range(POSTS_ON_PAGE):
+            Post.objects.create(text='Еще пост', author=self.author)
+        first = self.guest_client.get(reverse('api:index')).json()
+        self.assertEqual(len(first['results']), POSTS_ON_PAGE)
+        second = self.guest_client.get(
+            reverse('api:index'), {'cursor': first['next_cursor']}).json()
+        self.assertEqual(
+            [post['id'] for post in second['results']], [self.post.pk])
+
+    def test_post_detail_includes_comments(self):
+        """Пост отдается вместе с первой порцией комментариев."""
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        data = self.guest_client.get(
+            reverse('api:post_detail', args=(self.post.pk,))).json()
+        self.assertEqual(data['post']['id'], self.post.pk)
+        self.assertEqual(
+            data['comments']['results'][0]['text'], 'Комментарий')
+
+    def test_unchanged_feed_returns_304_without_queries(self):
+        """Неизменная лента отвечает 304, не обращаясь к БД."""
+        url = reverse('api:index')
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_changes_update_validators(self):
+        """Правка поста и новый комментарий меняют ETag."""
+        feed_url = reverse('api:index')
+        detail_url = reverse('api:post_detail', args=(self.post.pk,))
+        feed_etag = self.guest_client.get(feed_url)['ETag']
+        detail_etag = self.guest_client.get(detail_url)['ETag']
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        response = self.guest_client.get(
+            feed_url, HTTP_IF_NONE_MATCH=feed_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.json()['results'][0]['text'], 'Исправленный пост')
+        detail_etag = self.guest_client.get(detail_url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        response = self.guest_client.get(
+            detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_feed(self):
+        """Лента подписок требует входа и меняется при подписке."""
+        url = reverse('api:follow_index')
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        response = self.reader_client.get(url)
+        self.assertEqual(response.json()['results'], [])
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(
+            [post['id'] for post in response.json()['results']],
+            [self.post.pk],
+        )
+
+    def test_unknown_objects_return_404(self):
+        """Несуществующие группа, автор и пост дают 404."""
+        urls = (
+            reverse('api:group', args=('missing',)),
+            reverse('api:profile', args=('missing',)),
+            reverse('api:post_detail', args=(self.post.pk + 1,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
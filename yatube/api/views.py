@@ -0,0 +1,85 @@
+from functools import wraps
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+
+from posts.comments import comments_page, serialize_comment
+from posts.conditional import conditional_feed, group_scopes, profile_scopes
+from posts.group_feed import groups, snapshot_page
+from posts.models import Follow, Post, User
+from posts.paginator import CURSOR_PARAM, CursorPaginator
+from posts.timeline import TIMELINE_DATE, timeline_posts
+from .serializers import serialize_page, serialize_post
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return json_response(
+                {'detail': 'Требуется авторизация.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def feed_response(request, posts, page=None, date_field=None):
+    if page is None:
+        page = CursorPaginator(posts, date_field=date_field).get_page(
+            request.GET.get(CURSOR_PARAM))
+    return json_response(serialize_page(page, serialize_post))
+
+
+def follow_scopes(request):
+    # Лента подписок меняется вместе с профилями авторов и их набором.
+    return [
+        f'profile:{author_id}'
+        for author_id in Follow.objects.filter(
+            user=request.user).values_list('author_id', flat=True)
+    ]
+
+
+@conditional_feed(lambda request: ['index'])
+def index(request):
+    return feed_response(request, Post.objects.for_feed())
+
+
+@conditional_feed(group_scopes)
+def group_posts(request, slug):
+    group = groups.get(slug)
+    return feed_response(
+        request, Post.objects.for_feed().filter(group=group),
+        snapshot_page(request, group))
+
+
+@conditional_feed(profile_scopes)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, Post.objects.for_feed().filter(author=author))
+
+
+@conditional_feed(
+    lambda request, post_id: [f'post:{post_id}', f'comments:{post_id}'])
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id)
+    comments = comments_page(request, post)
+    return json_response({
+        'post': serialize_post(post),
+        'comments': serialize_page(comments, serialize_comment),
+    })
+
+
+@api_login_required
+@conditional_feed(follow_scopes)
+def follow_index(request):
+    return feed_response(
+        request, timeline_posts(request.user), date_field=TIMELINE_DATE)
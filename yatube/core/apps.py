@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        if settings.RATE_LIMITS:
+            from . import ratelimit
+            # Ошибка в настройке кеша лимитов видна при старте.
+            ratelimit.bucket_cache()
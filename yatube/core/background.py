@@ -0,0 +1,42 @@
+"""Фоновые задачи процесса в пуле из BACKGROUND_WORKERS потоков."""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_WORKERS,
+            thread_name_prefix='background',
+        )
+    return _executor
+
+
+def _in_worker(func, *args):
+    try:
+        return func(*args)
+    finally:
+        # Соединения потоков пула не должны висеть между задачами.
+        connection.close()
+
+
+def run_in_background(func, *args):
+    """Выполняет func(*args) в пуле потоков, а при BACKGROUND_WORKERS = 0
+    сразу в текущем потоке.
+    """
+    if not settings.BACKGROUND_WORKERS:
+        return func(*args)
+    return get_executor().submit(_in_worker, func, *args)
+
+
+def wait_for_tasks():
+    """Дожидается всех поставленных в пул задач."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,268 @@
+"""Бэкенды кеша, общие для нескольких процессов на одном хосте."""
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+CULL_EVERY = 100
+# RETURNING в incr() есть с SQLite 3.35, UPSERT в add() - с 3.24.
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в отдельном файле SQLite, общий для всех процессов хоста.
+
+    Целые числа хранятся как INTEGER, поэтому incr() атомарен между
+    процессами. Остальные значения сериализуются pickle. Нужна SQLite
+    не ниже MIN_SQLITE_VERSION.
+    """
+
+    def __init__(self, location, params):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise ImproperlyConfigured(
+                f'SQLiteCache нужна SQLite '
+                f'{".".join(map(str, MIN_SQLITE_VERSION))} или новее, '
+                f'установлена {sqlite3.sqlite_version}.'
+            )
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value, expires REAL)'
+            )
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _dump(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        row = self._db.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return default if row is None else self._load(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._db.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (self._key(key, version), self._dump(value),
+             self.get_backend_timeout(timeout)),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (self._key(key, version), self._dump(value),
+             self.get_backend_timeout(timeout), time.time()),
+        )
+        self._maybe_cull()
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),))
+
+    def incr(self, key, delta=1, version=None):
+        rows = self._db.execute(
+            'UPDATE cache SET value = value + ? WHERE key = ? '
+            "AND typeof(value) = 'integer' "
+            'AND (expires IS NULL OR expires > ?) RETURNING value',
+            (delta, self._key(key, version), time.time()),
+        ).fetchall()
+        if not rows:
+            raise ValueError("Key '%s' not found" % key)
+        return rows[0][0]
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живет в потоке между запросами, как у LocMemCache.
+        pass
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % CULL_EVERY:
+            return
+        db = self._db
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = db.execute('SELECT count(*) FROM cache').fetchone()[0]
+        if count > self._max_entries and self._cull_frequency:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY coalesce(expires, 1e18) LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+
+class TieredCache(BaseCache):
+    """Память процесса поверх общего кеша из OPTIONS['SHARED'].
+
+    Чтения обслуживает локальный уровень, записи идут в общий и
+    попадают в журнал инвалидаций. Остальные процессы читают журнал
+    не чаще раза в INVALIDATION_INTERVAL секунд и удаляют у себя
+    измененные ключи, так что чужая запись видна не позже этого срока.
+    """
+
+    SEQUENCE_KEY = 'tiered:sequence'
+    LOG_KEY = 'tiered:log:{}'
+
+    _states = {}
+    _states_lock = threading.Lock()
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._interval = options.get('INVALIDATION_INTERVAL', 1)
+        self._log_size = options.get('LOG_SIZE', 1000)
+        name = location or 'tiered'
+        self._local = LocMemCache(name, {
+            'TIMEOUT': self._local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000)},
+        })
+        with self._states_lock:
+            self._state = self._states.setdefault(
+                name, {'sequence': None, 'next_sync': 0,
+                       'lock': threading.Lock()})
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_timeout_for(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self._local_timeout
+        return min(timeout, self._local_timeout)
+
+    def _sync(self):
+        state = self._state
+        now = time.monotonic()
+        if now < state['next_sync'] or not state['lock'].acquire(False):
+            return
+        try:
+            state['next_sync'] = now + self._interval
+            sequence = self.shared.get(self.SEQUENCE_KEY, 0)
+            seen = state['sequence']
+            if seen is None or sequence < seen:
+                self._local.clear()
+            elif sequence - seen > self._log_size:
+                self._local.clear()
+            elif sequence > seen:
+                log_keys = [
+                    self.LOG_KEY.format(number)
+                    for number in range(seen + 1, sequence + 1)
+                ]
+                entries = self.shared.get_many(log_keys)
+                if len(entries) < len(log_keys):
+                    self._local.clear()
+                for key, version in entries.values():
+                    self._local.delete(key, version=version)
+            state['sequence'] = sequence
+        finally:
+            state['lock'].release()
+
+    def _publish(self, key, version):
+        shared = self.shared
+        try:
+            number = shared.incr(self.SEQUENCE_KEY)
+        except ValueError:
+            shared.add(self.SEQUENCE_KEY, 0, None)
+            number = shared.incr(self.SEQUENCE_KEY)
+        shared.set(
+            self.LOG_KEY.format(number), (key, version),
+            max(self._interval * 10, self._local_timeout),
+        )
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        missing = object()
+        value = self._local.get(key, missing, version=version)
+        if value is not missing:
+            return value
+        value = self.shared.get(key, missing, version=version)
+        if value is missing:
+            return default
+        self._local.set(key, value, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local.set(
+            key, value, self._local_timeout_for(timeout), version=version)
+        self._publish(key, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local.delete(key, version=version)
+            self._publish(key, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self._local.delete(key, version=version)
+        self._publish(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self._local.delete(key, version=version)
+        self._publish(key, version)
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self._local.clear()
+        self._state['sequence'] = 0
@@ -0,0 +1,59 @@
+"""Чтение с реплик для представлений только на чтение.
+
+Реплики включаются для запроса ReplicaRoutingMiddleware; вне запросов
+(воркеры, команды) и после первой записи чтение идет из основной БД.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_state = threading.local()
+
+
+def reset():
+    """Начало и конец запроса: читать из основной БД, записей не было."""
+    _state.allow_replicas = False
+    _state.wrote = False
+
+
+def allow_replicas():
+    """Разрешает запросу читать с реплик, пока он ничего не записал."""
+    _state.allow_replicas = not wrote()
+
+
+def pin_primary():
+    """До конца запроса читать из основной БД."""
+    _state.allow_replicas = False
+
+
+def wrote():
+    """Была ли в этом запросе запись в БД."""
+    return getattr(_state, 'wrote', False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты - из той же БД, что и сам объект.
+            return instance._state.db
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and getattr(_state, 'allow_replicas', False):
+            return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # Реплики отстают: после записи читаем то, что записали.
+        _state.allow_replicas = False
+        _state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики - копии основной БД, схему им приносит репликация.
+        return db == PRIMARY
@@ -0,0 +1,105 @@
+"""Очередь исходящих писем: запрос кладет письмо в БД и сразу отвечает,
+воркер send_queued_mail отправляет их пачками через одно соединение.
+"""
+import copy
+import logging
+import pickle
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+# Сколько секунд письмо закреплено за взявшим его воркером.
+LEASE_TIMEOUT = 300
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Сохраняет письма в очередь вместо отправки."""
+
+    def send_messages(self, email_messages):
+        now = timezone.now()
+        queued = []
+        for message in email_messages:
+            message = copy.copy(message)
+            message.connection = None
+            queued.append(QueuedEmail(
+                message=pickle.dumps(message), next_attempt=now))
+        QueuedEmail.objects.bulk_create(queued)
+        return len(queued)
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой растет вдвое с каждой неудачей."""
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(batch_size=BATCH_SIZE):
+    """Закрепляет за воркером пачку писем, время которых пришло.
+
+    Письмо, взятое упавшим воркером, снова станет доступно через
+    LEASE_TIMEOUT секунд.
+    """
+    now = timezone.now()
+    worker = uuid.uuid4().hex
+    due = QueuedEmail.objects.filter(failed=False, next_attempt__lte=now)
+    QueuedEmail.objects.filter(
+        pk__in=list(due.values_list('pk', flat=True)[:batch_size]),
+        next_attempt__lte=now,
+    ).update(
+        worker=worker,
+        next_attempt=now + timedelta(seconds=LEASE_TIMEOUT),
+    )
+    return list(QueuedEmail.objects.filter(worker=worker))
+
+
+def _failed(queued, error):
+    queued.attempts += 1
+    queued.last_error = f'{type(error).__name__}: {error}'
+    queued.failed = queued.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS
+    queued.next_attempt = timezone.now() + retry_delay(queued.attempts)
+    queued.worker = ''
+    queued.save(update_fields=(
+        'attempts', 'last_error', 'failed', 'next_attempt', 'worker'))
+    logger.warning('Письмо %s не отправлено: %s', queued.pk, queued.last_error)
+
+
+def deliver(batch_size=BATCH_SIZE, connection=None):
+    """Отправляет одну пачку писем и возвращает (отправлено, ошибок).
+
+    Все письма пачки идут через одно соединение EMAIL_QUEUE_BACKEND;
+    после ошибки оно закрывается и открывается заново для следующего.
+    Переданное connection остается открытым для следующих пачек.
+    """
+    batch = claim(batch_size)
+    if not batch:
+        return 0, 0
+    own_connection = connection is None
+    if own_connection:
+        connection = get_connection(settings.EMAIL_QUEUE_BACKEND)
+    sent = errors = 0
+    try:
+        for queued in batch:
+            try:
+                # Уже открытое соединение open() оставляет как есть.
+                connection.open()
+                connection.send_messages([pickle.loads(queued.message)])
+            except Exception as error:
+                errors += 1
+                _failed(queued, error)
+                connection.close()
+            else:
+                sent += 1
+                queued.delete()
+    finally:
+        if own_connection:
+            connection.close()
+    return sent, errors
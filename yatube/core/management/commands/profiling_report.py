@@ -0,0 +1,34 @@
+from time import time
+
+from django.core.management.base import BaseCommand
+
+from core.profiling import METRICS, PERCENTILES, report
+
+
+class Command(BaseCommand):
+    help = 'Выводит перцентили замеров профилирования по URL-именам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=float,
+            help='Учитывать только замеры за последние N часов.',
+        )
+
+    def handle(self, *args, **options):
+        since = time() - options['hours'] * 3600 if options['hours'] else None
+        summary = report(since=since)
+        if not summary:
+            self.stdout.write('Замеров нет.')
+            return
+        for view, metrics in summary.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{view} ({metrics["count"]} замеров)'))
+            for metric in METRICS:
+                if metric not in metrics:
+                    continue
+                values = ' '.join(
+                    f'p{p}={metrics[metric][f"p{p}"]:.1f}'
+                    for p in PERCENTILES
+                )
+                self.stdout.write(f'  {metric:<13} {values}')
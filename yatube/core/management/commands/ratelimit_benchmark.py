@@ -0,0 +1,54 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from core import ratelimit
+from core.profiling import PERCENTILES, percentile
+
+# Лимит, который не срабатывает: замеряется только сама проверка.
+LIMITS = {'user': '1000000/s', 'ip': '1000000/s'}
+VIEW_NAME = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, сколько добавляет к запросу проверка лимитов: обе '
+        'корзины, пользователя и IP, в кеше RATE_LIMIT_CACHE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=1.0,
+            help='Допустимая средняя добавка в мс.',
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().post('/', REMOTE_ADDR='192.0.2.1')
+        request.user = get_user_model()(pk=0, username=VIEW_NAME)
+        timings = []
+        for _ in range(options['requests']):
+            started = perf_counter()
+            ratelimit.check(request, VIEW_NAME, LIMITS)
+            timings.append((perf_counter() - started) * 1000)
+        ratelimit.bucket_cache().delete_many([
+            ratelimit.KEY.format(VIEW_NAME, scope, ident)
+            for scope, ident in ratelimit.identities(request)
+        ])
+        mean = sum(timings) / len(timings)
+        timings.sort()
+        self.stdout.write(
+            f'{settings.CACHES[settings.RATE_LIMIT_CACHE]["BACKEND"]}: '
+            f'среднее {mean:.3f} мс, ' + ', '.join(
+                f'p{p} {percentile(timings, p):.3f} мс'
+                for p in PERCENTILES)
+        )
+        if mean > options['budget']:
+            raise CommandError(
+                f'Проверка лимитов дольше {options["budget"]} мс.')
+        self.stdout.write(self.style.SUCCESS('В пределах бюджета.'))
@@ -0,0 +1,45 @@
+from time import sleep
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core.mail import BATCH_SIZE, deliver
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение, '
+        'неудачные повторяет с растущей паузой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и выйти, а не ждать новых писем.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Сколько секунд ждать, когда очередь пуста.',
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection(settings.EMAIL_QUEUE_BACKEND)
+        try:
+            while True:
+                sent, errors = deliver(options['batch_size'], connection)
+                if sent or errors:
+                    self.stdout.write(
+                        f'Отправлено {sent}, ошибок {errors}.')
+                    continue
+                # Пока писем нет, соединение не держим.
+                connection.close()
+                if options['once']:
+                    return
+                sleep(options['interval'])
+        finally:
+            connection.close()
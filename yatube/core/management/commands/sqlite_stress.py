@@ -0,0 +1,33 @@
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from core.sqlite_backend.stress import ENGINES, stress
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает параллельную запись в SQLite со стандартным '
+        'бэкендом Django и с core.sqlite_backend.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--writes',
+            type=int,
+            default=50,
+            help='Сколько транзакций с записью делает каждый поток.',
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, engine in ENGINES.items():
+                result = stress(
+                    engine, directory, options['threads'], options['writes'])
+                self.stdout.write(
+                    f'{name:8} записей {result["writes"]:6} '
+                    f'ошибок {result["errors"]:6} '
+                    f'в секунду {result["per_second"]:9.1f} '
+                    f'чтений {result["reads"]:7}'
+                )
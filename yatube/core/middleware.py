@@ -0,0 +1,86 @@
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import db_router, profiling, ratelimit
+from .views import too_many_requests
+
+
+class ProfilingMiddleware:
+    """Выборочно замеряет запросы и пишет замеры в PROFILING_STORE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        sample = profiling.Sample()
+        with ExitStack() as stack:
+            stack.enter_context(profiling.activate(sample))
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(sample.query_wrapper))
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else None
+        profiling.append(sample.as_record(view, response.status_code))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Пускает на реплики чтение в DATABASE_REPLICA_VIEWS.
+
+    После запроса с записью клиент DATABASE_REPLICA_LAG секунд читает
+    из основной БД, чтобы видеть свои изменения.
+    """
+    cookie_name = 'read_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db_router.reset()
+        try:
+            response = self.get_response(request)
+            if db_router.wrote():
+                response.set_cookie(
+                    self.cookie_name, '1',
+                    max_age=settings.DATABASE_REPLICA_LAG,
+                    httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            db_router.reset()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name
+            in settings.DATABASE_REPLICA_VIEWS
+            and self.cookie_name not in request.COOKIES
+        ):
+            db_router.allow_replicas()
+
+
+class RateLimitMiddleware:
+    """Отвечает 429, если клиент исчерпал лимит из RATE_LIMITS."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        limits = settings.RATE_LIMITS.get(view_name)
+        if not limits or request.method not in limits.get(
+                'methods', ratelimit.WRITE_METHODS):
+            return None
+        retry_after = ratelimit.check(request, view_name, limits)
+        if retry_after:
+            return too_many_requests(request, retry_after)
+        return None
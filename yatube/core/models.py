@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class QueuedEmail(models.Model):
+    """Письмо в очереди на отправку воркером send_queued_mail."""
+    message = models.BinaryField(verbose_name='Письмо')
+    created = models.DateTimeField(
+        verbose_name='Дата постановки',
+        auto_now_add=True,
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Число попыток',
+        default=0,
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    failed = models.BooleanField(
+        verbose_name='Попытки исчерпаны',
+        default=False,
+    )
+    worker = models.CharField(
+        verbose_name='Воркер, взявший письмо',
+        max_length=32,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ('next_attempt', 'pk')
@@ -0,0 +1,71 @@
+"""Кеш целых страниц для гостей с защитой от одновременной пересборки."""
+from functools import wraps
+from hashlib import md5
+from time import monotonic, sleep
+
+from django.conf import settings
+from django.core.cache import cache
+
+PAGE_KEY = 'page:{}'
+LOCK_KEY = 'page:lock:{}'
+LOCK_TIMEOUT = 10
+WAIT_TIMEOUT = 3
+WAIT_STEP = 0.05
+
+
+def is_cacheable(request):
+    return (
+        settings.PAGE_CACHE_TIMEOUT
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def _store(key, response):
+    if response.status_code != 200 or response.cookies or response.streaming:
+        return
+    if callable(getattr(response, 'render', None)):
+        response.render()
+    cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+
+
+def cached_page(request, version, build):
+    """Отдает страницу гостя из кеша или строит ее через build().
+
+    Ключ - полный путь с запросом и version (например, поколения лент).
+    Строит страницу один запрос: он берет блокировку, остальные ждут
+    готовый ответ до WAIT_TIMEOUT и только потом строят сами.
+    """
+    digest = md5(f'{request.get_full_path()}|{version}'.encode()).hexdigest()
+    key = PAGE_KEY.format(digest)
+    response = cache.get(key)
+    if response is not None:
+        return response
+    lock = LOCK_KEY.format(digest)
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            response = build()
+            _store(key, response)
+            return response
+        finally:
+            cache.delete(lock)
+    deadline = monotonic() + WAIT_TIMEOUT
+    while monotonic() < deadline:
+        sleep(WAIT_STEP)
+        response = cache.get(key)
+        if response is not None:
+            return response
+        if not cache.get(lock):
+            break
+    return build()
+
+
+def cache_anonymous_page(view):
+    """Кеширует страницу для гостей на PAGE_CACHE_TIMEOUT секунд."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable(request):
+            return view(request, *args, **kwargs)
+        return cached_page(
+            request, '', lambda: view(request, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,148 @@
+import json
+import logging
+import math
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from time import monotonic, time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+# Заполненное хранилище переименовывается в этот файл, прежний удаляется.
+ROTATED_SUFFIX = '.1'
+
+METRICS = ('wall_ms', 'queries', 'db_ms', 'template_ms', 'thumbnail_ms')
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+class Sample:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = monotonic()
+        self.queries = 0
+        self.timings = defaultdict(float)
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        started = monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.timings['db'] += monotonic() - started
+
+    def as_record(self, view, status):
+        record = {
+            'ts': round(time(), 3),
+            'view': view,
+            'status': status,
+            'wall_ms': (monotonic() - self.started) * 1000,
+            'queries': self.queries,
+        }
+        for kind in ('db', 'template', 'thumbnail'):
+            record[f'{kind}_ms'] = self.timings[kind] * 1000
+        return record
+
+
+@contextmanager
+def activate(sample):
+    _local.sample = sample
+    try:
+        yield sample
+    finally:
+        _local.sample = None
+
+
+@contextmanager
+def track(kind):
+    """Добавляет время блока к замеру текущего запроса, если он идет."""
+    sample = getattr(_local, 'sample', None)
+    if sample is None:
+        yield
+        return
+    started = monotonic()
+    try:
+        yield
+    finally:
+        sample.timings[kind] += monotonic() - started
+
+
+def _rotate(path):
+    """Откладывает хранилище, выросшее до PROFILING_STORE_MAX_BYTES.
+
+    На диске остается не больше двух таких файлов.
+    """
+    try:
+        if os.path.getsize(path) < settings.PROFILING_STORE_MAX_BYTES:
+            return
+        os.replace(path, path + ROTATED_SUFFIX)
+    except FileNotFoundError:
+        # Файла еще нет или его только что отложил другой процесс.
+        pass
+
+
+def append(record, path=None):
+    """Дописывает замер строкой JSON в конец файла."""
+    path = path or settings.PROFILING_STORE
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    try:
+        with _write_lock:
+            _rotate(path)
+            with open(path, 'a') as f:
+                f.write(line)
+    except OSError:
+        logger.exception('Не удалось записать замер')
+
+
+def percentile(values, p):
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not values:
+        return None
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def _records(path):
+    """Замеры из отложенного и текущего файлов хранилища."""
+    for name in (path + ROTATED_SUFFIX, path):
+        try:
+            with open(name) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def report(path=None, since=None):
+    """Сводка по URL-именам: число замеров и перцентили каждой метрики.
+
+    Метрики, которых нет в замере, пропускаются.
+    """
+    counts = defaultdict(int)
+    values = defaultdict(lambda: defaultdict(list))
+    for record in _records(path or settings.PROFILING_STORE):
+        if since and record.get('ts', 0) < since:
+            continue
+        view = record.get('view')
+        counts[view] += 1
+        for metric in METRICS:
+            value = record.get(metric)
+            if value is not None:
+                values[view][metric].append(value)
+    summary = {}
+    for view, count in sorted(counts.items(), key=lambda i: str(i[0])):
+        summary[view] = {'count': count}
+        for metric, samples in values[view].items():
+            samples.sort()
+            summary[view][metric] = {
+                f'p{p}': percentile(samples, p) for p in PERCENTILES
+            }
+    return summary
@@ -0,0 +1,107 @@
+"""Ограничение частоты запросов к пишущим представлениям.
+
+Корзина токенов в варианте GCRA: на корзину в общем кеше хранится одно
+целое - теоретическое время следующего запроса (TAT) в мс. Запрос
+атомарно сдвигает его на интервал между токенами через cache.incr()
+и проходит, если TAT ушел вперед не дальше емкости корзины, иначе
+сдвиг возвращается. Корзины видны всем процессам, а пропущенный
+запрос стоит одного обращения к кешу.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from math import ceil
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+KEY = 'ratelimit:{}:{}:{}'
+# Ключ корзины пересоздается полным не чаще, чем раз в KEY_TIMEOUT секунд.
+KEY_TIMEOUT = 60 * 60
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# Кеши, не видные другим процессам, и FileBasedCache, у которого incr()
+# читает и перезаписывает файл: параллельные запросы перерасходуют корзину.
+UNFIT_CACHES = (LocMemCache, DummyCache, FileBasedCache)
+
+Rate = namedtuple('Rate', ('capacity', 'interval'))
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/m' - 10 запросов подряд, дальше по одному раз в 6 секунд.
+
+    Возвращает емкость корзины и интервал между токенами в мс.
+    """
+    count, period = rate.split('/')
+    count = int(count)
+    return Rate(count, max(1, round(PERIODS[period] * 1000 / count)))
+
+
+def bucket_cache():
+    """Кеш RATE_LIMIT_CACHE: общий для процессов, с атомарным incr()."""
+    cache = caches[settings.RATE_LIMIT_CACHE]
+    if isinstance(cache, UNFIT_CACHES):
+        raise ImproperlyConfigured(
+            f'RATE_LIMIT_CACHE={settings.RATE_LIMIT_CACHE!r}: '
+            f'{type(cache).__name__} не годится для корзин, нужен кеш, '
+            f'общий для процессов, с атомарным incr().'
+        )
+    return cache
+
+
+def take(key, rate, now=None):
+    """Берет токен из корзины: 0 или сколько секунд ждать следующего."""
+    cache = bucket_cache()
+    now = int((time() if now is None else now) * 1000)
+    try:
+        tat = cache.incr(key, rate.interval)
+    except ValueError:
+        tat = None
+    if tat is None or tat - rate.interval < now:
+        # Корзина полна: отсчет с текущего момента.
+        cache.set(key, now + rate.interval, KEY_TIMEOUT)
+        return 0
+    overflow = tat - now - rate.capacity * rate.interval
+    if overflow <= 0:
+        return 0
+    give_back(key, rate)
+    return overflow / 1000
+
+
+def give_back(key, rate):
+    try:
+        bucket_cache().incr(key, -rate.interval)
+    except ValueError:
+        pass
+
+
+def identities(request):
+    if request.user.is_authenticated:
+        yield 'user', request.user.pk
+    yield 'ip', request.META.get('REMOTE_ADDR', '')
+
+
+def check(request, view_name, limits):
+    """Берет по токену из корзин пользователя и IP для view_name.
+
+    Возвращает 0 или сколько целых секунд ждать. При отказе токены,
+    уже взятые из других корзин, возвращаются.
+    """
+    taken = []
+    for scope, ident in identities(request):
+        if scope not in limits:
+            continue
+        key = KEY.format(view_name, scope, ident)
+        rate = parse_rate(limits[scope])
+        wait = take(key, rate)
+        if wait:
+            for key, rate in taken:
+                give_back(key, rate)
+            return max(1, ceil(wait))
+        taken.append((key, rate))
+    return 0
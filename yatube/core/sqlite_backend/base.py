@@ -0,0 +1,173 @@
+"""SQLite для продакшена: WAL, настройки соединения и один писатель.
+
+Каждое новое соединение получает SQLITE_PRAGMAS. Транзакции начинаются
+с BEGIN IMMEDIATE: блокировка на запись берется сразу, а не посреди
+транзакции, где SQLite не ждет busy_timeout и сразу отвечает
+"database is locked". Внутри процесса пишущие транзакции и одиночные
+записи по очереди берут одну блокировку на файл БД, между процессами
+их разводит busy_timeout. Захват блокировки БД повторяется
+SQLITE_WRITE_RETRIES раз с растущей паузой.
+
+Транзакция из read_only() - согласованный снимок для чтения: она
+начинается обычным BEGIN и очередь писателей не занимает.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.sqlite3 import base
+from django.utils.functional import cached_property
+
+Database = base.Database
+
+WRITE_RE = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+# Пауза перед первым повтором, дальше она растет вдвое.
+RETRY_DELAY = 0.05
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+class Writer:
+    """Очередь писателей в один файл БД внутри процесса."""
+
+    def __init__(self, name):
+        with _locks_lock:
+            self.lock = _locks.setdefault(name, threading.RLock())
+        pragmas = settings.SQLITE_PRAGMAS
+        # Очередь ждем не дольше busy_timeout, как и сама SQLite.
+        self.timeout = int(pragmas.get('busy_timeout', 5000)) / 1000
+        self.attempts = settings.SQLITE_WRITE_RETRIES + 1
+
+    def acquire(self):
+        """Встает в очередь; OperationalError, если она не дошла за
+        busy_timeout. Писать без очереди нельзя.
+        """
+        if not self.lock.acquire(timeout=self.timeout):
+            raise Database.OperationalError(
+                'database is locked: очередь писателей не освободилась '
+                f'за {self.timeout:g} с')
+
+    def retry(self, func):
+        """Выполняет func(), повторяя его, пока БД заблокирована."""
+        for attempt in range(self.attempts):
+            try:
+                return func()
+            except Database.OperationalError as error:
+                if 'locked' not in str(error) or attempt + 1 == self.attempts:
+                    raise
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+
+    def run(self, func):
+        """Выполняет одиночную запись в свою очередь."""
+        self.acquire()
+        try:
+            return self.retry(func)
+        finally:
+            self.lock.release()
+
+
+@contextmanager
+def read_only(using=None):
+    """Транзакция для чтения без очереди писателей.
+
+    На других движках - обычный transaction.atomic().
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    connection.read_only_requested = True
+    try:
+        with transaction.atomic(using=using):
+            connection.read_only_requested = False
+            yield
+    finally:
+        connection.read_only_requested = False
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    writer = None
+    read_only = staticmethod(lambda: False)
+
+    def _write(self, method, query, *args):
+        if self.writer is None or not WRITE_RE.match(query):
+            return method(self, query, *args)
+        if self.read_only():
+            raise Database.OperationalError(
+                'Запись в транзакции read_only().')
+        if self.connection.in_transaction:
+            return method(self, query, *args)
+        # Запись вне транзакции - сама себе транзакция.
+        return self.writer.run(partial(method, self, query, *args))
+
+    def execute(self, query, params=None):
+        return self._write(base.SQLiteCursorWrapper.execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._write(
+            base.SQLiteCursorWrapper.executemany, query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    holds_writer = False
+    read_only_requested = False
+    in_read_only = False
+
+    @cached_property
+    def writer(self):
+        return Writer(self.settings_dict['NAME'])
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.writer = self.writer
+        cursor.read_only = lambda: self.in_read_only
+        return cursor
+
+    def _release_writer(self):
+        self.in_read_only = False
+        if self.holds_writer:
+            self.holds_writer = False
+            self.writer.lock.release()
+
+    def _start_transaction_under_autocommit(self):
+        if self.read_only_requested:
+            self.in_read_only = True
+            with self.wrap_database_errors:
+                self.connection.execute('BEGIN')
+            return
+        with self.wrap_database_errors:
+            self.writer.acquire()
+        self.holds_writer = True
+        try:
+            with self.wrap_database_errors:
+                self.writer.retry(
+                    partial(self.connection.execute, 'BEGIN IMMEDIATE'))
+        except Exception:
+            self._release_writer()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_writer()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_writer()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_writer()
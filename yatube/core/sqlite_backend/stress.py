@@ -0,0 +1,93 @@
+"""Нагрузочная проверка записи в SQLite из нескольких потоков.
+
+Каждый поток, как add_comment, в транзакции читает таблицу и вставляет
+строку; заодно один поток все время читает.
+"""
+import os
+import threading
+import uuid
+from time import monotonic
+
+from django.db import OperationalError, connections, transaction
+
+ENGINES = {
+    'default': 'django.db.backends.sqlite3',
+    'tuned': 'core.sqlite_backend',
+}
+
+
+def _writer(alias, writes, results):
+    connection = connections[alias]
+    done = errors = 0
+    try:
+        for number in range(writes):
+            try:
+                with transaction.atomic(using=alias):
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT count(*) FROM stress')
+                        cursor.execute(
+                            'INSERT INTO stress (text) VALUES (%s)',
+                            [f'Комментарий {number}'],
+                        )
+                done += 1
+            except OperationalError:
+                errors += 1
+    finally:
+        connection.close()
+    results.append((done, errors))
+
+
+def _reader(alias, stop, reads):
+    connection = connections[alias]
+    try:
+        while not stop.is_set():
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT count(*) FROM stress')
+                reads.append(1)
+            except OperationalError:
+                pass
+    finally:
+        connection.close()
+
+
+def stress(engine, directory, threads=8, writes=50):
+    """Гоняет параллельные записи в новый файл БД с движком engine.
+
+    Возвращает число удачных записей и ошибок, записей в секунду
+    и чтений, которые успел сделать параллельный читатель.
+    """
+    alias = f'stress_{uuid.uuid4().hex}'
+    connections.databases[alias] = {
+        'ENGINE': engine,
+        'NAME': os.path.join(directory, f'{alias}.sqlite3'),
+    }
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE stress (id INTEGER PRIMARY KEY, text TEXT)')
+        connections[alias].close()
+        results, reads, stop = [], [], threading.Event()
+        workers = [
+            threading.Thread(target=_writer, args=(alias, writes, results))
+            for _ in range(threads)
+        ]
+        reader = threading.Thread(target=_reader, args=(alias, stop, reads))
+        started = monotonic()
+        reader.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        seconds = monotonic() - started
+        stop.set()
+        reader.join()
+    finally:
+        del connections.databases[alias]
+    done = sum(result[0] for result in results)
+    return {
+        'writes': done,
+        'errors': sum(result[1] for result in results),
+        'per_second': done / seconds if seconds else 0.0,
+        'reads': len(reads),
+    }
@@ -0,0 +1,706 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import (OperationalError, connection, connections, router,
+                       transaction)
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.http import HttpResponse
+from django.urls import reverse
+from io import StringIO
+
+from email import message_from_bytes, policy
+from http import HTTPStatus
+import json
+import multiprocessing
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from . import background, db_router, ratelimit
+from .cache_backends import SQLiteCache
+from .models import QueuedEmail
+from posts.models import Follow, Post
+from .sqlite_backend.base import read_only
+from .sqlite_backend.stress import stress
+from .page_cache import cached_page
+from .profiling import append, percentile, report
+
+User = get_user_model()
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        fd, self.store = tempfile.mkstemp(suffix='.ndjson')
+        os.close(fd)
+        self.addCleanup(os.remove, self.store)
+
+    def records(self):
+        with open(self.store) as f:
+            return [json.loads(line) for line in f]
+
+    def test_percentile_uses_nearest_rank(self):
+        """Перцентиль считается методом ближайшего ранга."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_sampled_request_is_recorded(self):
+        """Замер запроса пишется в хранилище с метриками."""
+        with override_settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_STORE=self.store
+        ):
+            self.guest_client.get(reverse('posts:index'))
+            self.guest_client.get(reverse('about:author'))
+            summary = report()
+        record = self.records()[0]
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], HTTPStatus.OK)
+        self.assertGreaterEqual(record['queries'], 1)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertEqual(
+            set(summary), {'posts:index', 'about:author'})
+
+    def test_unsampled_request_is_not_recorded(self):
+        """При нулевой выборке ничего не пишется."""
+        with override_settings(
+            PROFILING_SAMPLE_RATE=0, PROFILING_STORE=self.store
+        ):
+            self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(self.records(), [])
+
+    def test_report_skips_missing_metrics(self):
+        """Замеры без части метрик не ломают сводку."""
+        with open(self.store, 'w') as f:
+            f.write(json.dumps({'ts': 1, 'view': 'old', 'wall_ms': 5}) + '\n')
+            f.write(json.dumps({'view': 'old', 'queries': 2}) + '\n')
+        with override_settings(PROFILING_STORE=self.store):
+            summary = report()
+            out = StringIO()
+            call_command('profiling_report', stdout=out)
+        self.assertEqual(summary['old']['count'], 2)
+        self.assertEqual(summary['old']['wall_ms']['p50'], 5)
+        self.assertNotIn('db_ms', summary['old'])
+        self.assertIn('queries', out.getvalue())
+
+    def test_store_is_rotated_when_full(self):
+        """Полное хранилище откладывается, сводка читает оба файла."""
+        self.addCleanup(
+            lambda: os.path.exists(self.store + '.1')
+            and os.remove(self.store + '.1'))
+        with override_settings(
+            PROFILING_STORE=self.store, PROFILING_STORE_MAX_BYTES=100
+        ):
+            for number in range(5):
+                append({'view': 'rotated', 'wall_ms': number, 'pad': 'x' * 40})
+            summary = report()
+        self.assertLessEqual(os.path.getsize(self.store), 200)
+        self.assertEqual(len(self.records()), 1)
+        self.assertEqual(summary['rotated']['count'], 3)
+
+    def test_report_command_and_admin_page(self):
+        """Сводка доступна командой и персоналу в админке."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff_client = Client()
+        staff_client.force_login(staff)
+        with override_settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_STORE=self.store
+        ):
+            self.guest_client.get(reverse('posts:index'))
+            out = StringIO()
+            call_command('profiling_report', stdout=out)
+            self.assertIn('posts:index', out.getvalue())
+            response = staff_client.get(reverse('profiling_report'))
+            self.assertContains(response, 'posts:index')
+            response = self.guest_client.get(reverse('profiling_report'))
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+def increment_shared_counter(path, times):
+    store = SQLiteCache(path, {})
+    for _ in range(times):
+        store.incr('counter')
+
+
+class CacheBackendTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+
+    def tiered_settings(self, shared):
+        tiered = {
+            'BACKEND': 'core.cache_backends.TieredCache',
+            'OPTIONS': {'SHARED': 'shared', 'INVALIDATION_INTERVAL': 0},
+        }
+        return override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'shared': shared,
+            'first': dict(tiered, LOCATION='first'),
+            'second': dict(tiered, LOCATION='second'),
+        })
+
+    def test_sqlite_cache_needs_recent_sqlite(self):
+        """Без RETURNING и UPSERT кеш не создается, а не падает потом."""
+        with mock.patch('sqlite3.sqlite_version_info', (3, 31, 1)):
+            with self.assertRaisesMessage(ImproperlyConfigured, '3.35.0'):
+                SQLiteCache(self.path, {})
+
+    def test_sqlite_cache_operations(self):
+        """SQLite-кеш поддерживает основные операции и срок жизни."""
+        store = SQLiteCache(self.path, {})
+        store.set('post', {'text': 'Пост'})
+        self.assertEqual(store.get('post'), {'text': 'Пост'})
+        self.assertFalse(store.add('post', 'другой'))
+        self.assertTrue(store.add('counter', 1))
+        self.assertEqual(store.incr('counter', 2), 3)
+        self.assertEqual(store.get('counter'), 3)
+        with self.assertRaises(ValueError):
+            store.incr('missing')
+        store.delete('post')
+        self.assertIsNone(store.get('post'))
+        store.set('short', 'значение', 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(store.get('short'))
+        self.assertTrue(store.add('short', 'новое'))
+
+    def test_sqlite_cache_is_shared_between_processes(self):
+        """Счетчик в SQLite-кеше атомарно растет из нескольких процессов."""
+        SQLiteCache(self.path, {}).set('counter', 0, None)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(
+                target=increment_shared_counter, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(SQLiteCache(self.path, {}).get('counter'), 200)
+
+    def test_tiered_cache_invalidates_other_processes(self):
+        """Запись одного процесса сбрасывает локальный уровень другого."""
+        # LocMemCache с общим именем заменяет удаленный кеш в тесте.
+        with self.tiered_settings({
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'remote-stand-in',
+        }):
+            first, second = caches['first'], caches['second']
+            first.set('feed', 'v1')
+            self.assertEqual(second.get('feed'), 'v1')
+            caches['shared'].set('feed', 'мимо журнала')
+            self.assertEqual(second.get('feed'), 'v1')
+            first.set('feed', 'v2')
+            self.assertEqual(second.get('feed'), 'v2')
+            first.add('generation', 1, None)
+            self.assertEqual(second.get('generation'), 1)
+            first.incr('generation')
+            self.assertEqual(second.get('generation'), 2)
+            first.delete('feed')
+            self.assertIsNone(second.get('feed'))
+            caches['shared'].clear()
+
+    def test_tiered_cache_over_sqlite(self):
+        """Двухуровневый кеш работает поверх SQLite-кеша."""
+        with self.tiered_settings({
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': self.path,
+        }):
+            first, second = caches['first'], caches['second']
+            first.set('feed', 'v1')
+            self.assertEqual(second.get('feed'), 'v1')
+            second.set('feed', 'v2')
+            self.assertEqual(first.get('feed'), 'v2')
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_about_page_is_cached_for_guests(self):
+        """Страница about отдается гостям из кеша без шаблонов."""
+        client = Client()
+        url = reverse('about:author')
+        client.get(url)
+        response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.templates, [])
+        user = User.objects.create_user(username='user')
+        client.force_login(user)
+        response = client.get(url)
+        self.assertTemplateUsed(response, 'about/author.html')
+
+    def test_concurrent_misses_build_page_once(self):
+        """Одновременные промахи строят страницу один раз."""
+        request = RequestFactory().get('/slow/')
+        request.user = AnonymousUser()
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return HttpResponse('страница')
+
+        responses = []
+        threads = [
+            threading.Thread(
+                target=lambda: responses.append(
+                    cached_page(request, '', build)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(
+            [response.content.decode() for response in responses],
+            ['страница'] * 5,
+        )
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный диалог SMTP: EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost ESMTP')
+        sender, recipients = None, []
+        for raw in self.rfile:
+            command = raw.decode(errors='replace').strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip(), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                self.receive(sender, recipients)
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+    def receive(self, sender, recipients):
+        lines = []
+        for raw in self.rfile:
+            if raw in (b'.\r\n', b'.\n'):
+                break
+            lines.append(raw[1:] if raw.startswith(b'..') else raw)
+        with self.server.lock:
+            if self.server.failures:
+                self.server.failures -= 1
+                self.reply('451 Try again later')
+                return
+            self.server.messages.append(message_from_bytes(
+                b''.join(lines), policy=policy.default))
+        self.reply('250 OK')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP-сервер в фоновом потоке, складывающий письма в messages.
+
+    failures - сколько первых писем отклонить временной ошибкой 451.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, failures=0):
+        super().__init__((host, port), SMTPHandler)
+        self.messages = []
+        self.failures = failures
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_QUEUE_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+)
+class EmailQueueTests(TestCase):
+    def send(self, count):
+        for i in range(count):
+            mail.send_mail(
+                f'Письмо {i}', 'Текст', 'yatube@example.com',
+                [f'user{i}@example.com'])
+
+    def deliver(self, server):
+        with override_settings(EMAIL_PORT=server.port):
+            call_command('send_queued_mail', '--once', stdout=StringIO())
+
+    def test_password_reset_is_queued(self):
+        """Письмо сброса пароля ставится в очередь, а не отправляется."""
+        User.objects.create_user(
+            username='user', email='user@example.com', password='secret')
+        response = Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_sends_over_one_connection_and_retries(self):
+        """Воркер шлет пачку через одно соединение и повторяет ошибки."""
+        self.send(3)
+        with LocalSMTPServer(failures=1) as server:
+            self.deliver(server)
+            self.assertEqual(len(server.messages), 2)
+            # Новое соединение открывается только после ошибки.
+            self.assertEqual(server.connections, 2)
+            queued = QueuedEmail.objects.get()
+            self.assertEqual(queued.attempts, 1)
+            self.assertIn('451', queued.last_error)
+            self.deliver(server)
+            self.assertEqual(len(server.messages), 2)
+            QueuedEmail.objects.update(next_attempt=queued.created)
+            self.deliver(server)
+        self.assertEqual(len(server.messages), 3)
+        self.assertFalse(QueuedEmail.objects.exists())
+        self.assertEqual(
+            sorted(message['Subject'] for message in server.messages),
+            ['Письмо 0', 'Письмо 1', 'Письмо 2'])
+
+    @override_settings(EMAIL_QUEUE_MAX_ATTEMPTS=1)
+    def test_exhausted_attempts_stop_retries(self):
+        """После последней попытки письмо больше не отправляется."""
+        self.send(1)
+        with LocalSMTPServer(failures=1) as server:
+            self.deliver(server)
+            QueuedEmail.objects.update(
+                next_attempt=QueuedEmail.objects.get().created)
+            self.deliver(server)
+        self.assertEqual(server.messages, [])
+        self.assertTrue(QueuedEmail.objects.get().failed)
+
+
+class BackgroundTests(TestCase):
+    @override_settings(BACKGROUND_WORKERS=0)
+    def test_runs_inline_without_workers(self):
+        self.assertEqual(
+            background.run_in_background(threading.get_ident),
+            threading.get_ident())
+
+    @override_settings(BACKGROUND_WORKERS=1)
+    def test_runs_in_pool(self):
+        future = background.run_in_background(threading.get_ident)
+        background.wait_for_tasks()
+        self.assertNotEqual(future.result(), threading.get_ident())
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], PAGE_CACHE_TIMEOUT=0)
+class ReplicaRoutingTests(TestCase):
+    """Реплика - второй файл SQLite, снятый с основной БД до теста."""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        fd, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.replica_path,
+        }
+        for alias in ('default', 'replica'):
+            connections[alias].ensure_connection()
+        connections['default'].connection.backup(
+            connections['replica'].connection)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        delattr(connections._connections, 'replica')
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(
+            username='author', password='secret')
+        Post.objects.create(text='Пост только в основной БД', author=self.user)
+
+    def get_later(self, url):
+        """Запрос, когда лента уже давно не менялась."""
+        later = time.time() + 60
+        with mock.patch('posts.conditional.time', return_value=later):
+            return self.guest_client.get(url)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Вне запросов и при записи используется основная БД."""
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_related_objects_are_read_from_instance_database(self):
+        """Автор поста из основной БД не ищется на реплике."""
+        post = Post.objects.get()
+        self.addCleanup(db_router.reset)
+        db_router.reset()
+        db_router.allow_replicas()
+        self.assertEqual(router.db_for_read(User, instance=post), 'default')
+        self.assertEqual(post.author, self.user)
+
+    def test_read_only_views_read_from_replica(self):
+        """Лента читается с реплики, где поста еще нет."""
+        response = self.get_later(reverse('posts:index'))
+        self.assertNotContains(response, 'Пост только в основной БД')
+
+    def test_recent_changes_are_read_from_primary(self):
+        """Недавно измененная лента читается из основной БД."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост только в основной БД')
+
+    def test_client_reads_own_writes(self):
+        """После записи клиент читает из основной БД."""
+        response = self.guest_client.post(
+            reverse('users:login'),
+            {'username': 'author', 'password': 'secret'},
+        )
+        self.assertIn('read_primary', response.cookies)
+        response = self.get_later(reverse('posts:index'))
+        self.assertContains(response, 'Пост только в основной БД')
+        self.assertEqual(response.context['user'], self.user)
+        del self.guest_client.cookies['read_primary']
+        # Автора на реплике еще нет.
+        response = self.get_later(
+            reverse('posts:profile', args=[self.user.username]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class SQLiteBackendTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connections_get_pragmas(self):
+        """Настройки применяются к каждому соединению."""
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -16 * 1024)
+
+    def test_concurrent_writes_are_not_lost(self):
+        """Параллельные транзакции с записью не падают с locked."""
+        with tempfile.TemporaryDirectory() as directory:
+            result = stress('core.sqlite_backend', directory, 4, 25)
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['writes'], 100)
+
+    def file_database(self):
+        """Псевдоним новой БД в файле на движке core.sqlite_backend."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        alias = f'file_db_{self._testMethodName}'
+        connections.databases[alias] = {
+            'ENGINE': 'core.sqlite_backend',
+            'NAME': os.path.join(directory.name, 'db.sqlite3'),
+        }
+        self.addCleanup(connections.databases.pop, alias)
+        self.addCleanup(connections[alias].close)
+        with connections[alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+        return alias
+
+    def hold_writer(self, alias):
+        """Держит очередь писателей БД из другого потока до конца теста."""
+        lock = connections[alias].writer.lock
+        taken, release = threading.Event(), threading.Event()
+
+        def hold():
+            with lock:
+                taken.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        taken.wait()
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 100})
+    def test_read_only_transaction_skips_writer_queue(self):
+        """Чтение не ждет писателя, а запись по таймауту - ошибка."""
+        alias = self.file_database()
+        self.hold_writer(alias)
+        with read_only(alias):
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM items')
+                self.assertEqual(cursor.fetchone(), (0,))
+        with self.assertRaises(OperationalError):
+            with transaction.atomic(using=alias):
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('INSERT INTO items DEFAULT VALUES')
+        with self.assertRaises(OperationalError):
+            with connections[alias].cursor() as cursor:
+                cursor.execute('INSERT INTO items DEFAULT VALUES')
+
+    def test_read_only_transaction_refuses_writes(self):
+        alias = self.file_database()
+        with self.assertRaises(OperationalError):
+            with read_only(alias):
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('INSERT INTO items DEFAULT VALUES')
+        with connections[alias].cursor() as cursor:
+            cursor.execute('INSERT INTO items DEFAULT VALUES')
+            cursor.execute('SELECT count(*) FROM items')
+            self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_stress_command_compares_backends(self):
+        out = StringIO()
+        call_command('sqlite_stress', threads=2, writes=5, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines],
+                         ['default', 'tuned'])
+
+
+@override_settings(RATE_LIMITS={
+    'posts:add_comment': {'user': '2/m', 'ip': '3/m'},
+    'posts:profile_follow': {'user': '1/m', 'methods': ()},
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit.bucket_cache().clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        self.clients = []
+        for name in ('first', 'second'):
+            client = Client()
+            client.force_login(User.objects.create_user(username=name))
+            self.clients.append(client)
+
+    def comment(self, client):
+        return client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Комментарий'})
+
+    def test_bucket_refills_over_time(self):
+        """Корзина на 2 запроса в минуту: токен возвращается за 30 с."""
+        rate = ratelimit.parse_rate('2/m')
+        self.assertEqual(rate, ratelimit.Rate(2, 30000))
+        now = 1000.0
+        self.assertEqual(ratelimit.take('bucket', rate, now), 0)
+        self.assertEqual(ratelimit.take('bucket', rate, now), 0)
+        self.assertEqual(ratelimit.take('bucket', rate, now), 30)
+        self.assertEqual(ratelimit.take('bucket', rate, now + 10), 20)
+        self.assertEqual(ratelimit.take('bucket', rate, now + 30), 0)
+        self.assertEqual(ratelimit.take('bucket', rate, now + 30), 30)
+        # После простоя корзина снова полна, но не больше емкости.
+        for _ in range(2):
+            self.assertEqual(ratelimit.take('bucket', rate, now + 600), 0)
+        self.assertTrue(ratelimit.take('bucket', rate, now + 600))
+
+    def test_user_limit_returns_429(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.comment(self.clients[0]).status_code, HTTPStatus.FOUND)
+        response = self.comment(self.clients[0])
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_ip_limit_is_shared_by_users(self):
+        """Лимит IP общий, а отказ по нему не тратит токен пользователя."""
+        for client in self.clients:
+            self.comment(client)
+        self.comment(self.clients[0])
+        self.assertEqual(
+            self.comment(self.clients[1]).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(
+            self.comment(self.clients[1]).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS)
+        ratelimit.bucket_cache().delete(ratelimit.KEY.format(
+            'posts:add_comment', 'ip', '127.0.0.1'))
+        self.assertEqual(
+            self.comment(self.clients[1]).status_code, HTTPStatus.FOUND)
+
+    def test_only_configured_methods_are_counted(self):
+        detail = reverse('posts:post_detail', args=(self.post.pk,))
+        for _ in range(3):
+            self.assertEqual(
+                self.clients[0].get(detail).status_code, HTTPStatus.OK)
+
+    def test_only_new_follows_are_counted(self):
+        """Повторная подписка данных не меняет и токен не берет."""
+        url = reverse('posts:profile_follow', args=(self.author.username,))
+        for _ in range(3):
+            self.assertEqual(
+                self.clients[0].get(url).status_code, HTTPStatus.FOUND)
+        other = reverse('posts:profile_follow', args=('second',))
+        self.assertEqual(
+            self.clients[0].get(other).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertFalse(Follow.objects.filter(author__username='second'))
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'files': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tempfile.gettempdir()},
+    }, RATE_LIMIT_CACHE='files')
+    def test_file_cache_is_refused(self):
+        """incr() файлового кеша не атомарен между процессами."""
+        with self.assertRaises(ImproperlyConfigured):
+            ratelimit.take('bucket', ratelimit.parse_rate('2/m'))
+
+    def test_buckets_are_shared_between_processes(self):
+        """По умолчанию корзины в общем кеше, а не в памяти процесса."""
+        self.assertNotIsInstance(
+            ratelimit.bucket_cache(), ratelimit.UNFIT_CACHES)
+
+    def test_tests_use_own_buckets(self):
+        """Корзины тестов не копятся в файле рядом с кодом."""
+        location = settings.CACHES[settings.RATE_LIMIT_CACHE]['LOCATION']
+        self.assertFalse(location.startswith(settings.BASE_DIR))
+
+    @override_settings(
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        RATE_LIMIT_CACHE='default',
+    )
+    def test_process_local_cache_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ratelimit.take('bucket', ratelimit.parse_rate('2/m'))
+
+    def test_benchmark_stays_within_budget(self):
+        out = StringIO()
+        call_command('ratelimit_benchmark', requests=200, stdout=out)
+        self.assertIn('В пределах бюджета', out.getvalue())
@@ -1,5 +1,8 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
 
+from .profiling import METRICS, PERCENTILES, report
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +18,29 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+@staff_member_required
+def profiling_report(request):
+    percentiles = [f'p{p}' for p in PERCENTILES]
+    rows = [
+        (view, metrics['count'], [
+            metrics.get(metric, {}).get(p)
+            for metric in METRICS for p in percentiles
+        ])
+        for view, metrics in report().items()
+    ]
+    context = {
+        'title': 'Профилирование запросов',
+        'rows': rows,
+        'metrics': METRICS,
+        'percentiles': percentiles,
+    }
+    return render(request, 'core/profiling.html', context)
@@ -1,9 +1,11 @@
 from django.contrib import admin
 
+from search.admin import SearchIndexAdminMixin
+from search.backends.base import COMMENT, POST
 from .models import Post, Group, Comment
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(SearchIndexAdminMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -13,11 +15,12 @@ class PostAdmin(admin.ModelAdmin):
     )
     list_editable = ('group',)
     search_fields = ('text', )
+    search_kind = POST
     list_filter = ('pub_date', )
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SearchIndexAdminMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -26,6 +29,7 @@ class CommentAdmin(admin.ModelAdmin):
         'author',
     )
     search_fields = ('text', )
+    search_kind = COMMENT
     list_filter = ('created', )
     empty_value_display = '-пусто-'
 
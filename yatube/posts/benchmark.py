@@ -0,0 +1,191 @@
+"""Нагрузочные замеры лент: наполнение базы и прогон представлений."""
+import json
+import random
+import statistics
+import subprocess
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .bulk import explicit_dates, insert_batches
+from .counters import recount_post_counters
+from .models import Comment, Follow, Group, Post, User
+from .timeline import backfill_timelines
+from .trending import recompute as recompute_trending
+
+SCALE = {
+    'users': 100_000,
+    'groups': 100,
+    'posts': 1_000_000,
+    'follows': 5_000_000,
+    'comments': 10_000_000,
+}
+BATCH_SIZE = 5000
+USERNAME = 'bench_{}'
+READER = USERNAME.format(0)
+
+
+def seed(scale, batch_size=BATCH_SIZE, seed=0, report=print):
+    """Наполняет базу синтетическими данными заданного объема.
+
+    Рассчитана на пустую базу. Сигналы при bulk_create не срабатывают,
+    поэтому счетчики пересчитываются в конце, а ленту подписок
+    заполняет только для читателя READER, по которому идут замеры.
+    """
+    rng = random.Random(seed)
+    start = timezone.now() - timedelta(minutes=scale['posts'])
+    insert_batches(User, (
+        User(username=USERNAME.format(i), password='!')
+        for i in range(scale['users'])
+    ), batch_size, report)
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_').values_list('pk', flat=True))
+    insert_batches(Group, (
+        Group(title=f'Группа {i}', slug=f'bench-{i}', description='')
+        for i in range(scale['groups'])
+    ), batch_size, report)
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-').values_list('pk', flat=True))
+
+    with explicit_dates(Post._meta.get_field('pub_date')):
+        insert_batches(Post, (
+            Post(
+                text=f'Пост {i}',
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids) if i % 3 else None,
+                pub_date=start + timedelta(minutes=i),
+            )
+            for i in range(scale['posts'])
+        ), batch_size, report)
+
+    per_user = min(scale['follows'] // max(len(user_ids), 1),
+                   len(user_ids) - 1)
+    insert_batches(Follow, (
+        Follow(user_id=user_id, author_id=user_ids[(i + k) % len(user_ids)])
+        for i, user_id in enumerate(user_ids)
+        for k in range(1, per_user + 1)
+    ), batch_size, report)
+
+    post_range = Post.objects.order_by('pk').values_list('pk', flat=True)
+    first_post, last_post = post_range.first(), post_range.last()
+    with explicit_dates(Comment._meta.get_field('created')):
+        insert_batches(Comment, (
+            Comment(
+                text=f'Комментарий {i}',
+                post_id=rng.randint(first_post, last_post),
+                author_id=rng.choice(user_ids),
+                created=start + timedelta(seconds=i),
+            )
+            for i in range(scale['comments'])
+        ), batch_size, report)
+
+    recount_post_counters()
+    recompute_trending()
+    reader = User.objects.get(username=READER)
+    backfill_timelines(
+        reader.follower.values_list('user_id', 'author_id'))
+
+
+def _scenarios(reader):
+    post = Post.objects.filter(author=reader).first() or Post.objects.first()
+    group = Group.objects.filter(slug__startswith='bench-').first()
+    return (
+        ('index', 'get', reverse('posts:index'), {}),
+        ('group_posts', 'get',
+         reverse('posts:group', args=(group.slug,)), {}),
+        ('profile', 'get',
+         reverse('posts:profile', args=(reader.username,)), {}),
+        ('post_detail', 'get',
+         reverse('posts:post_detail', args=(post.pk,)), {}),
+        ('follow_index', 'get', reverse('posts:follow_index'), {}),
+        ('add_comment', 'post',
+         reverse('posts:add_comment', args=(post.pk,)),
+         {'text': 'Комментарий из замера'}),
+    )
+
+
+# Лимиты частоты отключены: замер шлет один и тот же POST десятки раз.
+@override_settings(RATE_LIMITS={})
+def run(repeat=20, warmup=3):
+    """Замеряет время и число запросов к БД для каждого представления."""
+    reader = User.objects.get(username=READER)
+    client = Client()
+    client.force_login(reader)
+    results = {}
+    for name, method, url, data in _scenarios(reader):
+        cache.clear()
+        request = getattr(client, method)
+        for _ in range(warmup):
+            request(url, data)
+        timings, queries = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = perf_counter()
+                response = request(url, data)
+                timings.append((perf_counter() - started) * 1000)
+            queries.append(len(ctx))
+        timings.sort()
+        results[name] = {
+            'status': response.status_code,
+            'p50_ms': statistics.median(timings),
+            'p95_ms': timings[max(int(len(timings) * 0.95) - 1, 0)],
+            'mean_ms': statistics.mean(timings),
+            'queries': max(queries),
+        }
+    return {
+        'commit': _current_commit(),
+        'created': timezone.now().isoformat(),
+        'rows': {
+            model.__name__: model.objects.count()
+            for model in (User, Post, Follow, Comment)
+        },
+        'results': results,
+    }
+
+
+def _current_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, threshold=0.2):
+    """Сравнивает два прогона; возвращает строки отчета и регрессии."""
+    lines, regressions = [], []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            lines.append(f'{name}: нет в базовом прогоне')
+            continue
+        change = (
+            result['p50_ms'] / base['p50_ms'] - 1 if base['p50_ms'] else 0)
+        line = (
+            f'{name}: p50 {base["p50_ms"]:.1f} -> {result["p50_ms"]:.1f} мс '
+            f'({change:+.0%}), запросов {base["queries"]} -> '
+            f'{result["queries"]}'
+        )
+        if change > threshold or result['queries'] > base['queries']:
+            regressions.append(name)
+            line += ' РЕГРЕССИЯ'
+        lines.append(line)
+    return lines, regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump(result, path):
+    with open(path, 'w') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,61 @@
+"""Пакетная вставка из генераторов с постоянным расходом памяти."""
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.db import connections, router, transaction
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Позволяет bulk_create записать свои значения в auto_now_add поля."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def capped_batch_size(model, objects, batch_size):
+    """batch_size в пределах того, что БД примет одним запросом.
+
+    Django 2.2 передает batch_size в bulk_create как есть, а SQLite
+    не принимает больше 999 параметров и 500 строк в одном INSERT.
+    """
+    ops = connections[router.db_for_write(model)].ops
+    return min(
+        batch_size, ops.bulk_batch_size(model._meta.concrete_fields, objects))
+
+
+def insert_batches(model, objects, batch_size, report=print,
+                   on_batch=None, ignore_conflicts=False):
+    """Вставляет объекты из генератора пачками, не держа их все в памяти.
+
+    on_batch(batch) вызывается в транзакции пачки после вставки.
+    Возвращает число обработанных объектов.
+    """
+    batch, total, started = [], 0, perf_counter()
+
+    def flush():
+        with transaction.atomic():
+            model.objects.bulk_create(
+                batch,
+                batch_size=capped_batch_size(model, batch, batch_size),
+                ignore_conflicts=ignore_conflicts)
+            if on_batch is not None:
+                on_batch(batch)
+
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            flush()
+            total += len(batch)
+            batch = []
+    if batch:
+        flush()
+        total += len(batch)
+    elapsed = perf_counter() - started
+    report(f'{model.__name__}: {total} строк, '
+           f'{total / elapsed if elapsed else 0:.0f} строк/с')
+    return total
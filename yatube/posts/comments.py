@@ -0,0 +1,18 @@
+"""Страницы комментариев поста для HTML и JSON."""
+from .models import Comment
+from .paginator import CURSOR_PARAM, CommentCursorPaginator
+
+
+def comments_page(request, post):
+    comments_list = Comment.objects.filter(post=post).select_related('author')
+    return CommentCursorPaginator(comments_list).get_page(
+        request.GET.get(CURSOR_PARAM))
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'author': comment.author.username,
+    }
@@ -0,0 +1,98 @@
+from functools import wraps
+from time import time
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from core.db_router import pin_primary
+from core.page_cache import cached_page, is_cacheable
+from .feed_cache import page_key, validators
+from .group_feed import groups
+from .models import Post, User
+
+
+def group_scopes(request, slug):
+    return [f'group:{groups.get(slug).pk}']
+
+
+def profile_scopes(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return [f'profile:{author.pk}']
+
+
+def post_detail_scopes(request, post_id):
+    # На странице поста показаны счетчик постов автора и название группы.
+    author_id, group_id = get_object_or_404(
+        Post.objects.values_list('author_id', 'group_id'), pk=post_id)
+    scopes = [
+        f'post:{post_id}', f'comments:{post_id}', f'profile:{author_id}']
+    if group_id:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def _set_headers(response, etag, last_modified, html, personal):
+    response.setdefault('ETag', etag)
+    if last_modified is not None:
+        response.setdefault('Last-Modified', http_date(last_modified))
+    if not html:
+        return
+    patch_vary_headers(response, ('Cookie',))
+    if personal:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.HTML_CACHE_MAX_AGE)
+
+
+def conditional_feed(scopes_func, html=False):
+    """Отвечает 304, если ленты из scopes_func не менялись.
+
+    scopes_func(request, *args, **kwargs) возвращает список лент, из
+    которых собран ответ. Валидаторы берутся из кеша поколений, поэтому
+    при совпадении шаблоны не трогаются, а БД - разве что для поиска
+    ленты по slug или имени.
+
+    Для HTML (html=True) ETag зависит еще и от пользователя и его
+    подписок, а ответ получает Cache-Control: публичный для гостей,
+    приватный с обязательной перепроверкой для вошедших. Гостям
+    страница отдается из кеша страниц с ключом по тому же ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = scopes_func(request, *args, **kwargs)
+            variant = page_key(request)
+            personal = html and request.user.is_authenticated
+            if personal:
+                scopes = [*scopes, f'follows:{request.user.pk}']
+                # В шапке имя пользователя, в формах - его CSRF-токен.
+                csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+                variant += f'|user={request.user.pk}|csrf={csrf}'
+            etag, last_modified = validators(scopes, variant)
+            if (last_modified is None
+                    or time() - last_modified < settings.DATABASE_REPLICA_LAG):
+                # Реплика могла еще не получить изменение, а страницу
+                # закешируют под новым поколением.
+                pin_primary()
+            if personal:
+                # If-Modified-Since не различает пользователей.
+                last_modified = None
+            etag = quote_etag(etag)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is None and html and is_cacheable(request):
+                response = cached_page(
+                    request, etag, lambda: view(request, *args, **kwargs))
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                _set_headers(response, etag, last_modified, html, personal)
+            return response
+        return wrapper
+    return decorator
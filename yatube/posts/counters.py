@@ -0,0 +1,95 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, Value
+from django.db.models.functions import Coalesce
+
+from .bulk import capped_batch_size
+from .models import AuthorStats, Group, User
+
+RECOUNT_BATCH_SIZE = 1000
+
+
+def _change_author_counter(author_id, field, delta):
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats.filter(**{f'{field}__gte': -delta}).update(
+            **{field: F(field) + delta})
+        return
+    if stats.update(**{field: F(field) + delta}):
+        return
+    try:
+        with transaction.atomic():
+            AuthorStats.objects.create(author_id=author_id, **{field: delta})
+    except IntegrityError:
+        # Строку успел создать параллельный запрос: сдвигаем ее.
+        stats.update(**{field: F(field) + delta})
+
+
+def change_author_post_count(author_id, delta):
+    """Атомарно сдвигает счетчик постов автора на delta."""
+    _change_author_counter(author_id, 'post_count', delta)
+
+
+def change_follower_count(author_id, delta):
+    """Атомарно сдвигает счетчик подписчиков автора на delta."""
+    _change_author_counter(author_id, 'follower_count', delta)
+
+
+def change_group_post_count(group_id, delta):
+    """Атомарно сдвигает счетчик постов группы на delta."""
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(post_count__gte=-delta)
+    groups.update(post_count=F('post_count') + delta)
+
+
+def _recount_author_counter(field, relation, batch_size, author_ids=None):
+    authors = User.objects.all()
+    if author_ids is not None:
+        authors = authors.filter(pk__in=author_ids)
+    drifted = (
+        authors
+        .annotate(
+            actual=Count(relation),
+            stored=Coalesce(
+                f'stats__{field}', Value(0), output_field=IntegerField()),
+        )
+        .exclude(actual=F('stored'))
+        .values_list('pk', 'actual', 'stats__author_id')
+    )
+    to_create, to_update = [], []
+    for author_id, actual, stats_id in drifted.iterator():
+        stats = AuthorStats(author_id=author_id, **{field: actual})
+        (to_update if stats_id else to_create).append(stats)
+    AuthorStats.objects.bulk_create(
+        to_create,
+        batch_size=capped_batch_size(AuthorStats, to_create, batch_size))
+    AuthorStats.objects.bulk_update(to_update, [field], batch_size=batch_size)
+    return {stats.author_id for stats in to_create + to_update}
+
+
+def recount_follower_counts(author_ids, batch_size=RECOUNT_BATCH_SIZE):
+    """Пересчитывает счетчики подписчиков авторов author_ids."""
+    return _recount_author_counter(
+        'follower_count', 'following', batch_size, author_ids)
+
+
+def recount_post_counters(batch_size=RECOUNT_BATCH_SIZE):
+    """Пересчитывает счетчики по таблицам постов и подписок.
+
+    Возвращает число исправленных авторов и групп.
+    """
+    drifted_groups = (
+        Group.objects
+        .annotate(actual=Count('groups'))
+        .exclude(post_count=F('actual'))
+    )
+    groups = []
+    for group in drifted_groups.iterator():
+        group.post_count = group.actual
+        groups.append(group)
+    Group.objects.bulk_update(groups, ['post_count'], batch_size=batch_size)
+
+    authors = _recount_author_counter('post_count', 'posts', batch_size)
+    authors |= _recount_author_counter(
+        'follower_count', 'following', batch_size)
+    return len(authors), len(groups)
@@ -0,0 +1,187 @@
+"""Кеш отрендеренных фрагментов лент.
+
+Ключ фрагмента состоит из ленты, страницы или курсора и номера поколения
+ленты. Изменение поста или комментария увеличивает поколение затронутых
+лент, и старые фрагменты больше не читаются, а истекают сами.
+По тем же поколениям строятся валидаторы условных запросов.
+"""
+import threading
+from collections import Counter
+from hashlib import md5
+from math import ceil
+from time import monotonic, time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .paginator import CURSOR_PARAM, PAGE_PARAM
+
+FEED_CACHE_TIMEOUT = 60 * 10
+FEEDS = ('index', 'group', 'profile', 'comments')
+GENERATION_KEY = 'feed:generation:{}'
+CHANGED_KEY = 'feed:changed:{}'
+FRAGMENT_KEY = 'feed:fragment:{}:{}:{}'
+STATS_KEY = 'feed:stats:{}:{}'
+# Попадания и промахи копятся в процессе и сбрасываются в общий кеш
+# не чаще раза в STATS_FLUSH_INTERVAL секунд.
+STATS_FLUSH_INTERVAL = 10
+
+_pending_stats = Counter()
+_stats_lock = threading.Lock()
+_next_flush = 0
+
+
+def generation(scope):
+    """Текущее поколение ленты.
+
+    Если счетчик вытеснен из кеша, начинает с текущего времени в мс,
+    чтобы не совпасть с поколениями уже лежащих в кеше фрагментов.
+    """
+    value = cache.get(GENERATION_KEY.format(scope))
+    if value is None:
+        _start(scope)
+        value = cache.get(GENERATION_KEY.format(scope))
+    return value
+
+
+def _start(scope):
+    now = time()
+    cache.add(GENERATION_KEY.format(scope), int(now * 1000), None)
+    cache.add(CHANGED_KEY.format(scope), now, None)
+
+
+def _bump(scopes):
+    for scope in scopes:
+        try:
+            cache.incr(GENERATION_KEY.format(scope))
+        except ValueError:
+            _start(scope)
+        cache.set(CHANGED_KEY.format(scope), time(), None)
+
+
+def bump(*scopes):
+    """Сбрасывает фрагменты лент.
+
+    Поколение увеличивается сразу и еще раз после коммита: фрагмент,
+    отрендеренный другим запросом до коммита, тоже будет сброшен.
+    """
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def post_scopes(post, previous=None):
+    """Ленты, в которых показан пост, до и после изменения."""
+    previous = previous or {}
+    scopes = {'index', f'post:{post.pk}'}
+    for feed, field in (('profile', 'author_id'), ('group', 'group_id')):
+        for value in (getattr(post, field), previous.get(field)):
+            if value:
+                scopes.add(f'{feed}:{value}')
+    return scopes
+
+
+def validators(scopes, page=''):
+    """ETag и время изменения (unix-время) для набора лент.
+
+    Если время изменения какой-то ленты неизвестно, второе значение None.
+    """
+    scopes = sorted(scopes)
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    keys += [CHANGED_KEY.format(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for scope in scopes:
+        if GENERATION_KEY.format(scope) not in values:
+            values[GENERATION_KEY.format(scope)] = generation(scope)
+            values.setdefault(
+                CHANGED_KEY.format(scope),
+                cache.get(CHANGED_KEY.format(scope)))
+    raw = '|'.join(
+        f'{scope}={values[GENERATION_KEY.format(scope)]}' for scope in scopes)
+    etag = md5(f'{raw}|{page}'.encode()).hexdigest()
+    changed = [values.get(CHANGED_KEY.format(scope)) for scope in scopes]
+    if not changed or None in changed:
+        return etag, None
+    return etag, ceil(max(changed))
+
+
+def page_key(request):
+    cursor = request.GET.get(CURSOR_PARAM)
+    if cursor:
+        return f'{CURSOR_PARAM}={cursor}'
+    return f'{PAGE_PARAM}={request.GET.get(PAGE_PARAM, 1)}'
+
+
+class FeedFragment:
+    """Описание кешируемого фрагмента для тега {% feedcache %}."""
+
+    def __init__(self, scope, page):
+        self.scope = scope
+        self.page = page
+
+    @property
+    def feed(self):
+        return self.scope.split(':')[0]
+
+    @property
+    def key(self):
+        return FRAGMENT_KEY.format(
+            self.scope, generation(self.scope), self.page)
+
+
+def feed_fragment(request, feed, scope_id=None):
+    scope = feed if scope_id is None else f'{feed}:{scope_id}'
+    return FeedFragment(scope, page_key(request))
+
+
+def _stats_cache():
+    # Мимо локального уровня TieredCache: счетчики читает только
+    # feed_cache_stats, и журналу инвалидаций они не нужны.
+    return getattr(cache, 'shared', cache)
+
+
+def flush_stats():
+    """Переносит счетчики процесса в общий кеш."""
+    global _next_flush
+    with _stats_lock:
+        pending = dict(_pending_stats)
+        _pending_stats.clear()
+        _next_flush = monotonic() + STATS_FLUSH_INTERVAL
+    target = _stats_cache()
+    for key, count in pending.items():
+        try:
+            target.incr(key, count)
+        except ValueError:
+            target.add(key, 0, None)
+            target.incr(key, count)
+
+
+def record(feed, outcome):
+    with _stats_lock:
+        _pending_stats[STATS_KEY.format(feed, outcome)] += 1
+        due = monotonic() >= _next_flush
+    if due:
+        flush_stats()
+
+
+def stats():
+    """Попадания и промахи по лентам с момента последнего сброса.
+
+    Счетчики других процессов видны с задержкой до STATS_FLUSH_INTERVAL.
+    """
+    flush_stats()
+    return {
+        feed: {
+            outcome: _stats_cache().get(STATS_KEY.format(feed, outcome), 0)
+            for outcome in ('hit', 'miss')
+        }
+        for feed in FEEDS
+    }
+
+
+def reset_stats():
+    flush_stats()
+    _stats_cache().delete_many([
+        STATS_KEY.format(feed, outcome)
+        for feed in FEEDS
+        for outcome in ('hit', 'miss')
+    ])
@@ -1,4 +1,7 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
 from .models import Post, Comment
 
 
@@ -10,6 +13,21 @@ class PostForm(forms.ModelForm):
         help_texts = {'text': 'Текст нового поста',
                       'group': 'Группа, к которой будет относиться пост', }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if not isinstance(image, UploadedFile):
+            return image
+        if image.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise forms.ValidationError(
+                'Картинка больше '
+                f'{filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)}.')
+        width, height = image.image.size
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            raise forms.ValidationError(
+                'Картинка больше '
+                f'{settings.IMAGE_UPLOAD_MAX_PIXELS / 10 ** 6:g} Мпикс.')
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
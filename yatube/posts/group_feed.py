@@ -0,0 +1,116 @@
+"""Снимки лент групп и группы по slug в памяти процесса.
+
+Снимок группы - позиции (pk, pub_date) последних SNAPSHOT_SIZE постов
+в общем кеше. Первые страницы ленты группы строятся по снимку, а посты
+страницы загружаются, только если ее фрагмент не нашелся в кеше
+фрагментов. Снимок пересобирается, когда пост появляется в группе или
+уходит из нее.
+
+Группы по slug живут в памяти процесса. Сохранение группы сбрасывает
+запись в своем процессе, в остальных она живет не дольше
+GROUP_CACHE_TIMEOUT секунд.
+"""
+import threading
+from collections import namedtuple
+from time import monotonic
+
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from .models import Group, Post
+from .paginator import (CURSOR_PARAM, PAGE_PARAM, POSTS_ON_PAGE,
+                        SnapshotCursorPaginator)
+from .thumbnails import prefetch_thumbnails
+
+SNAPSHOT_SIZE = 100
+SNAPSHOT_KEY = 'group:snapshot:{}'
+GROUP_CACHE_TIMEOUT = 60
+
+Entry = namedtuple('Entry', ('pk', 'pub_date'))
+
+
+class GroupCache:
+    """Группы по slug в памяти процесса."""
+
+    def __init__(self, timeout=GROUP_CACHE_TIMEOUT):
+        self.timeout = timeout
+        self.groups = {}
+        self.lock = threading.Lock()
+
+    def get(self, slug):
+        """Группа по slug; Http404, если ее нет."""
+        expires, group = self.groups.get(slug, (0, None))
+        if expires > monotonic():
+            return group
+        group = get_object_or_404(Group, slug=slug)
+        with self.lock:
+            self.groups[slug] = (monotonic() + self.timeout, group)
+        return group
+
+    def forget(self, group):
+        """Сбрасывает группу, в том числе под прежним slug."""
+        with self.lock:
+            for slug, (_, cached) in list(self.groups.items()):
+                if cached.pk == group.pk or slug == group.slug:
+                    del self.groups[slug]
+
+    def clear(self):
+        with self.lock:
+            self.groups.clear()
+
+
+groups = GroupCache()
+
+
+def refresh_snapshot(group_id):
+    """Пересобирает снимок группы по индексу (group, -pub_date, -id)."""
+    snapshot = [
+        Entry(*values) for values in
+        Post.objects.filter(group_id=group_id)
+        .order_by('-pub_date', '-pk')
+        .values_list('pk', 'pub_date')[:SNAPSHOT_SIZE]
+    ]
+    cache.set(SNAPSHOT_KEY.format(group_id), snapshot, None)
+    return snapshot
+
+
+def snapshot(group_id):
+    value = cache.get(SNAPSHOT_KEY.format(group_id))
+    if value is None:
+        value = refresh_snapshot(group_id)
+    return value
+
+
+def forget_snapshots(group_ids):
+    cache.delete_many([SNAPSHOT_KEY.format(pk) for pk in group_ids])
+
+
+def refresh_snapshots(*group_ids):
+    """Пересобирает снимки сразу и еще раз после коммита, как bump()."""
+    group_ids = {pk for pk in group_ids if pk}
+
+    def refresh():
+        for group_id in group_ids:
+            refresh_snapshot(group_id)
+
+    refresh()
+    transaction.on_commit(refresh)
+
+
+def load_posts(post_ids):
+    posts = Post.objects.for_feed().in_order(post_ids)
+    prefetch_thumbnails(posts)
+    return posts
+
+
+def snapshot_page(request, group):
+    """Страница ленты группы по снимку или None, если она вне снимка."""
+    if PAGE_PARAM in request.GET and CURSOR_PARAM not in request.GET:
+        return None
+    entries = snapshot(group.pk)
+    paginator = SnapshotCursorPaginator(
+        entries, load_posts, POSTS_ON_PAGE,
+        complete=len(entries) < SNAPSHOT_SIZE,
+    )
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))
@@ -0,0 +1,113 @@
+"""Обработка загруженных картинок постов вне запроса.
+
+Оригинал поворачивается по EXIF, уменьшается до IMAGE_MAX_SIDE
+и пересохраняется в IMAGE_UPLOAD_FORMAT без метаданных, после чего
+у поста записываются размеры и строятся миниатюры.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from core.background import run_in_background
+from .models import IMAGE_FAILED, IMAGE_PENDING, IMAGE_READY, Post
+from .thumbnails import (bump_image_feeds, delete_thumbnails,
+                         generate_thumbnails)
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'AVIF': 'avif'}
+
+
+def reset_image_info(post):
+    """Помечает новую картинку поста как ждущую обработки."""
+    post.image_width = post.image_height = None
+    post.image_status = IMAGE_PENDING if post.image else ''
+
+
+def _target_format(source_format):
+    """Формат из настроек, если Pillow умеет его писать, иначе исходный."""
+    Image.init()
+    target = settings.IMAGE_UPLOAD_FORMAT or source_format
+    return target if target in Image.SAVE else source_format
+
+
+def _convert(image, image_format):
+    has_alpha = (
+        image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info)
+    if image_format == 'JPEG' or not has_alpha:
+        return image.convert('RGB') if image.mode != 'RGB' else image
+    return image.convert('RGBA') if image.mode != 'RGBA' else image
+
+
+def _encode(image_name):
+    """Возвращает (файл, формат, ширина, высота) обработанной картинки.
+
+    Анимированные картинки не перекодируются: файл None.
+    """
+    max_side = settings.IMAGE_MAX_SIDE
+    with default_storage.open(image_name) as file, Image.open(file) as image:
+        if getattr(image, 'is_animated', False):
+            return None, image.format, image.width, image.height
+        image_format = _target_format(image.format)
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        image = _convert(image, image_format)
+        output = BytesIO()
+        image.save(
+            output, image_format, quality=settings.IMAGE_UPLOAD_QUALITY)
+        return ContentFile(output.getvalue()), image_format, *image.size
+
+
+def process_image(post_id, image_name):
+    """Обрабатывает картинку поста, если она не сменилась за это время."""
+    content, image_format, width, height = _encode(image_name)
+    new_name = image_name
+    if content is not None:
+        stem = os.path.splitext(image_name)[0]
+        new_name = default_storage.save(
+            f'{stem}.{EXTENSIONS.get(image_format, image_format.lower())}',
+            content)
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        image=new_name, image_width=width, image_height=height,
+        image_status=IMAGE_READY)
+    if not updated:
+        if new_name != image_name:
+            default_storage.delete(new_name)
+        return
+    if new_name != image_name:
+        default_storage.delete(image_name)
+        delete_thumbnails(image_name)
+    # Ленты сбрасываются, когда миниатюры готовы: иначе фрагменты
+    # закешируются с оригиналом вместо вариантов.
+    if not generate_thumbnails(new_name):
+        bump_image_feeds(new_name)
+
+
+def safe_process_image(post_id, image_name):
+    """Обрабатывает картинку, ошибку записывает в статус поста."""
+    try:
+        process_image(post_id, image_name)
+        return True
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', image_name)
+        if Post.objects.filter(pk=post_id, image=image_name).update(
+                image_status=IMAGE_FAILED):
+            bump_image_feeds(image_name)
+        return False
+
+
+def enqueue_image(post):
+    """Ставит обработку картинки поста в очередь после коммита."""
+    if not post.image:
+        return
+    post_id, image_name = post.pk, post.image.name
+    transaction.on_commit(
+        lambda: run_in_background(safe_process_image, post_id, image_name))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import compare, load
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает два JSON-отчета run_benchmark и ищет регрессии.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline')
+        parser.add_argument('current')
+        parser.add_argument('--threshold', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        lines, regressions = compare(
+            load(options['baseline']), load(options['current']),
+            options['threshold'],
+        )
+        self.stdout.write('\n'.join(lines))
+        if regressions:
+            raise CommandError(f'Регрессии: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
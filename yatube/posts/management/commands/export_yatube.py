@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import BATCH_SIZE, FORMATS, MODELS, write_csv, write_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает пользователей, группы, посты, комментарии '
+        'и подписки в NDJSON или CSV. Пароли не выгружаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON ("-" - стандартный вывод) или папка для CSV.',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=MODELS,
+            default=MODELS,
+            help='Что выгружать, по умолчанию все.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк читать из БД за раз.',
+        )
+
+    def handle(self, *args, **options):
+        models = [model for model in MODELS if model in options['models']]
+        report = self.stderr.write
+        if options['format'] == 'csv':
+            write_csv(
+                options['path'], models, options['batch_size'], report)
+        elif options['path'] == '-':
+            write_ndjson(self.stdout, models, options['batch_size'], report)
+        else:
+            with open(options['path'], 'w', encoding='utf-8') as stream:
+                write_ndjson(stream, models, options['batch_size'], report)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed_cache import reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = 'Выводит попадания и промахи кеша фрагментов лент.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счетчики после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        for feed, counts in stats().items():
+            total = counts['hit'] + counts['miss']
+            ratio = counts['hit'] / total if total else 0
+            self.stdout.write(
+                f'{feed:<9} попаданий {counts["hit"]}, '
+                f'промахов {counts["miss"]}, доля попаданий {ratio:.0%}'
+            )
+        if options['reset']:
+            reset_stats()
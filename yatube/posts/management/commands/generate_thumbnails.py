@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import safe_generate_thumbnails
+
+CHUNK_SIZE = 16
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие миниатюры картинок постов на всех ядрах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов, по умолчанию - по числу ядер.',
+        )
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        images = [
+            name for name in (
+                Post.objects.exclude(image='')
+                .values_list('image', flat=True).order_by().distinct()
+                .iterator()
+            )
+            if default_storage.exists(name)
+        ]
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            created = sum(executor.map(
+                safe_generate_thumbnails, images, chunksize=CHUNK_SIZE))
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок: {len(images)}, новых миниатюр: {created} '
+            f'за {monotonic() - started:.1f} с.'
+        ))
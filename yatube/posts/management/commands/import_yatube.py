@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (BATCH_SIZE, FORMATS, import_records, read_csv,
+                            read_ndjson)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает выгрузку export_yatube пачками bulk_create. '
+        'Существующие пользователи, группы и подписки пропускаются, '
+        'посты и комментарии загружаются только в пустые таблицы. '
+        'Пользователи создаются без пароля. Картинки постов обрабатывает '
+        'потом команда process_images.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON ("-" - стандартный ввод) или папка с CSV.',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк вставлять одной пачкой.',
+        )
+
+    def load(self, records, batch_size):
+        try:
+            import_records(records, batch_size, self.stdout.write)
+        except ValueError as error:
+            raise CommandError(error)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['format'] == 'csv':
+            self.load(read_csv(options['path']), batch_size)
+        elif options['path'] == '-':
+            self.load(read_ndjson(sys.stdin), batch_size)
+        else:
+            with open(options['path'], encoding='utf-8') as stream:
+                self.load(read_ndjson(stream), batch_size)
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена.'))
@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.images import safe_process_image
+from posts.models import IMAGE_FAILED, IMAGE_READY, Post
+
+CHUNK_SIZE = 16
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает картинки постов, которые еще не обработаны: '
+        'старые загрузки и прерванные перезапуском.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов, по умолчанию - по числу ядер.',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Повторить и картинки, обработка которых не удалась.',
+        )
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        skipped = [IMAGE_READY]
+        if not options['retry_failed']:
+            skipped.append(IMAGE_FAILED)
+        posts = list(
+            Post.objects.exclude(image='').exclude(image_status__in=skipped)
+            .values_list('pk', 'image').order_by()
+        )
+        ids, names = zip(*posts) if posts else ((), ())
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            ready = sum(executor.map(
+                safe_process_image, ids, names, chunksize=CHUNK_SIZE))
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок: {len(posts)}, обработано: {ready} '
+            f'за {monotonic() - started:.1f} с.'
+        ))
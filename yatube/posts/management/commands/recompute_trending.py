@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import RECOMPUTE_BATCH_SIZE, recompute
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги ленты популярного по постам и комментариям '
+        'за последнюю неделю и обновляет список лучших в кеше.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECOMPUTE_BATCH_SIZE,
+            help='Размер пачки при записи рейтингов.',
+        )
+
+    def handle(self, *args, **options):
+        count = recompute(options['batch_size'], report=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рейтингов: {count}.'))
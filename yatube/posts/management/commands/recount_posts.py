@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import RECOUNT_BATCH_SIZE, recount_post_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики постов авторов и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECOUNT_BATCH_SIZE,
+            help='Размер пачки при записи исправленных счетчиков.',
+        )
+
+    def handle(self, *args, **options):
+        authors, groups = recount_post_counters(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счетчиков: авторов {authors}, групп {groups}.'
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import compare, dump, load, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа и число запросов лент и сохраняет JSON; '
+        'с --baseline сравнивает с прошлым прогоном.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--baseline', help='JSON прошлого прогона.')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Допустимый рост p50, доля.',
+        )
+
+    def handle(self, *args, **options):
+        result = run(options['repeat'], options['warmup'])
+        dump(result, options['output'])
+        for name, values in result['results'].items():
+            self.stdout.write(
+                f'{name}: p50 {values["p50_ms"]:.1f} мс, '
+                f'p95 {values["p95_ms"]:.1f} мс, '
+                f'запросов {values["queries"]}'
+            )
+        if not options['baseline']:
+            return
+        lines, regressions = compare(
+            load(options['baseline']), result, options['threshold'])
+        self.stdout.write('\n'.join(lines))
+        if regressions:
+            raise CommandError(f'Регрессии: {", ".join(regressions)}')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import BATCH_SIZE, SCALE, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет пустую базу синтетическими пользователями, постами, '
+        'подписками и комментариями для замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help='Множитель объема относительно полного набора.',
+        )
+        for name, count in SCALE.items():
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                help=f'Сколько создать, по умолчанию {count} * scale.',
+            )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        scale = {
+            name: options[name] if options[name] is not None
+            else max(int(count * options['scale']), 1)
+            for name, count in SCALE.items()
+        }
+        seed(scale, options['batch_size'], options['seed'],
+             report=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS('База наполнена.'))
@@ -0,0 +1,101 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:57
+
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+# Те же правила, что в posts.timeline.
+TIMELINE_LENGTH = 1000
+FANOUT_MAX_FOLLOWERS = 1000
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    follower_counts = (
+        Follow.objects.values_list('author').annotate(Count('pk')).order_by()
+    )
+    for author_id, follower_count in follower_counts:
+        AuthorStats.objects.update_or_create(
+            author_id=author_id,
+            defaults={'follower_count': follower_count},
+        )
+    fanned_out = (
+        Follow.objects.filter(
+            author__stats__follower_count__lt=FANOUT_MAX_FOLLOWERS)
+        .order_by('author_id').values_list('author_id', 'user_id')
+    )
+
+    def entries():
+        for author_id, follows in groupby(
+                fanned_out.iterator(), key=lambda follow: follow[0]):
+            user_ids = [user_id for _, user_id in follows]
+            posts = list(
+                Post.objects.filter(author_id=author_id)
+                .order_by('-pub_date', '-pk')
+                .values_list('pk', 'pub_date')[:TIMELINE_LENGTH]
+            )
+            for user_id in user_ids:
+                for pk, pub_date in posts:
+                    yield TimelineEntry(
+                        user_id=user_id, post_id=pk, pub_date=pub_date)
+
+    batch_size = schema_editor.connection.ops.bulk_batch_size(
+        TimelineEntry._meta.concrete_fields, [])
+    pending = entries()
+    for batch in iter(lambda: list(islice(pending, batch_size)), []):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+    overfull = (
+        TimelineEntry.objects.values_list('user_id', flat=True)
+        .annotate(entries=Count('pk')).filter(entries__gt=TIMELINE_LENGTH)
+        .order_by()
+    )
+    for user_id in overfull:
+        timeline = TimelineEntry.objects.filter(user_id=user_id)
+        pub_date, post_id = timeline.order_by(
+            '-pub_date', '-post_id').values_list(
+            'pub_date', 'post_id')[TIMELINE_LENGTH - 1]
+        timeline.filter(
+            models.Q(pub_date__lt=pub_date)
+            | models.Q(pub_date=pub_date, post_id__lt=post_id)
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число подписчиков'),
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date'], name='timeline_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:13
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+import django.db.models.expressions
+
+
+def remove_invalid_follows(apps, schema_editor):
+    """Убирает дубли подписок и подписки на себя перед ограничениями."""
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    authors = set()
+    for user_id in Follow.objects.filter(
+            user=F('author')).values_list('user', flat=True):
+        TimelineEntry.objects.filter(
+            user_id=user_id, post__author_id=user_id).delete()
+        authors.add(user_id)
+    Follow.objects.filter(user=F('author')).delete()
+    duplicates = (
+        Follow.objects.values('user', 'author')
+        .annotate(first=Min('pk'), copies=Count('pk'))
+        .filter(copies__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        Follow.objects.filter(
+            user=row['user'], author=row['author'],
+        ).exclude(pk=row['first']).delete()
+        authors.add(row['author'])
+    for author_id in authors:
+        AuthorStats.objects.filter(author_id=author_id).update(
+            follower_count=Follow.objects.filter(author_id=author_id).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_invalid_follows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created', '-id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.CheckConstraint(check=models.Q(_negated=True, user=django.db.models.expressions.F('author')), name='no_self_follow'),
+        ),
+    ]
@@ -3,6 +3,33 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+IMAGE_PENDING = 'pending'
+IMAGE_READY = 'ready'
+IMAGE_FAILED = 'failed'
+IMAGE_STATUSES = (
+    (IMAGE_PENDING, 'Обрабатывается'),
+    (IMAGE_READY, 'Готова'),
+    (IMAGE_FAILED, 'Ошибка обработки'),
+)
+
+
+class PostQuerySet(models.QuerySet):
+    feed_fields = (
+        'id', 'text', 'pub_date', 'image', 'image_width', 'image_height',
+        'image_status',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__slug', 'group__title',
+    )
+
+    def for_feed(self):
+        """Посты для лент: автор и группа одним JOIN, только нужные поля."""
+        return self.select_related('author', 'group').only(*self.feed_fields)
+
+    def in_order(self, post_ids):
+        """Посты в порядке post_ids одним запросом; удаленные пропускаются."""
+        posts = self.in_bulk(post_ids)
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
+
 
 class Post(models.Model):
     text = models.TextField(
@@ -33,18 +60,52 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        editable=False,
+    )
+    image_status = models.CharField(
+        'Обработка картинки',
+        max_length=10,
+        choices=IMAGE_STATUSES,
+        blank=True,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ('-pub_date', )
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'), name='post_date_idx'),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_date_idx'),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_date_idx'),
+        )
 
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    post_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.title
@@ -70,6 +131,13 @@ class Comment(models.Model):
         related_name='comments'
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created_idx'),
+        )
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -83,3 +151,81 @@ class Follow(models.Model):
         null=True,
         on_delete=models.CASCADE
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'),
+        )
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики автора."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор',
+    )
+    post_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+    )
+    follower_count = models.PositiveIntegerField(
+        verbose_name='Число подписчиков',
+        default=0,
+    )
+
+    @classmethod
+    def post_count_for(cls, author):
+        """Счетчик постов автора; stats лучше подтянуть select_related."""
+        stats = getattr(author, 'stats', None)
+        return stats.post_count if stats else 0
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_timeline_entry'),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date'), name='timeline_user_date_idx'),
+        )
+
+
+class TrendingScore(models.Model):
+    """Рейтинг поста в ленте популярного, см. posts.trending."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField(verbose_name='Рейтинг')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('-score',), name='trending_score_idx'),
+        )
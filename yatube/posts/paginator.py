@@ -0,0 +1,230 @@
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+POSTS_ON_PAGE = 10
+COMMENTS_ON_PAGE = 20
+CURSOR_PARAM = 'cursor'
+PAGE_PARAM = 'page'
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, obj, field='pub_date'):
+    """Упаковывает позицию объекта в ленте в непрозрачный токен."""
+    raw = f'{direction}|{getattr(obj, field).isoformat()}|{obj.pk}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(token):
+    """Распаковывает токен в (направление, дата, pk) или None."""
+    try:
+        direction, pub_date, pk = force_str(
+            urlsafe_base64_decode(token)).split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (дата, id): без COUNT(*) и OFFSET.
+
+    Страница выбирается условием на ключ последней показанной записи,
+    поэтому новые записи не сдвигают уже открытые страницы.
+    """
+    is_cursor = True
+    date_field = 'pub_date'
+    ordering = ('-pub_date', '-pk')
+
+    def __init__(self, object_list, per_page=POSTS_ON_PAGE, date_field=None):
+        if date_field is not None:
+            self.date_field = date_field
+            self.ordering = (f'-{date_field}', '-pk')
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+        self.has_previous = False
+        self.has_next = False
+        self._window = []
+
+    @property
+    def count(self):
+        """Число постов в загруженном окне, без запроса к БД."""
+        return len(self._window)
+
+    @property
+    def num_pages(self):
+        return 1 + self.has_previous + self.has_next
+
+    def get_page(self, token=None):
+        cursor = decode_cursor(token) if token else None
+        queryset = self.object_list
+        if cursor is None:
+            posts = list(queryset[:self.per_page + 1])
+            self.has_next = len(posts) > self.per_page
+            posts = posts[:self.per_page]
+        else:
+            direction, date, pk = cursor
+            field = self.date_field
+            if direction == NEXT:
+                posts = list(queryset.filter(
+                    Q(**{f'{field}__lt': date})
+                    | Q(**{field: date, 'pk__lt': pk})
+                )[:self.per_page + 1])
+                self.has_previous = True
+                self.has_next = len(posts) > self.per_page
+                posts = posts[:self.per_page]
+            else:
+                posts = list(queryset.filter(
+                    Q(**{f'{field}__gt': date})
+                    | Q(**{field: date, 'pk__gt': pk})
+                ).reverse()[:self.per_page + 1])
+                self.has_next = True
+                self.has_previous = len(posts) > self.per_page
+                posts = posts[:self.per_page][::-1]
+        self._window = posts
+        page = Page(posts, 1 + self.has_previous, self)
+        page.next_cursor = (
+            encode_cursor(NEXT, posts[-1], self.date_field)
+            if self.has_next else None
+        )
+        page.previous_cursor = (
+            encode_cursor(PREVIOUS, posts[0], self.date_field)
+            if self.has_previous else None
+        )
+        return page
+
+
+class SnapshotPosts:
+    """Посты страницы снимка; загружаются при первом переборе."""
+
+    def __init__(self, post_ids, load):
+        self.post_ids = post_ids
+        self.load = load
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    def __iter__(self):
+        return iter(self.load(self.post_ids))
+
+
+class SnapshotCursorPaginator(CursorPaginator):
+    """Курсорный пагинатор по готовому списку позиций (pk, pub_date).
+
+    Ссылки на страницы совместимы с CursorPaginator. Посты страницы
+    загружает load(ids), когда страницу начинают перебирать. complete -
+    в списке все посты ленты, иначе страница, выходящая за конец
+    списка, не отдается: get_page() возвращает None.
+    """
+
+    def __init__(self, entries, load, per_page=POSTS_ON_PAGE,
+                 complete=False):
+        Paginator.__init__(self, entries, per_page)
+        self.load = load
+        self.complete = complete
+        self.has_previous = False
+        self.has_next = False
+        self._window = []
+
+    def _position(self, date, pk, strict=True):
+        """Индекс первой позиции после (date, pk) в порядке ленты."""
+        for index, entry in enumerate(self.object_list):
+            key = (entry.pub_date, entry.pk)
+            if key < (date, pk) or not strict and key == (date, pk):
+                return index
+        return len(self.object_list)
+
+    def get_page(self, token=None):
+        cursor = decode_cursor(token) if token else None
+        per_page = self.per_page
+        if cursor is not None and cursor[0] == PREVIOUS:
+            end = self._position(*cursor[1:], strict=False)
+            if not end or end == len(self.object_list) and not self.complete:
+                return None
+            entries = self.object_list[max(0, end - per_page - 1):end]
+            self.has_next = True
+            self.has_previous = len(entries) > per_page
+            entries = entries[-per_page:]
+        else:
+            start = self._position(*cursor[1:]) if cursor else 0
+            entries = self.object_list[start:start + per_page + 1]
+            if len(entries) <= per_page and not self.complete:
+                return None
+            self.has_previous = cursor is not None
+            self.has_next = len(entries) > per_page
+            entries = entries[:per_page]
+        self._window = entries
+        page = Page(
+            SnapshotPosts([entry.pk for entry in entries], self.load),
+            1 + self.has_previous, self)
+        page.next_cursor = (
+            encode_cursor(NEXT, entries[-1]) if self.has_next else None)
+        page.previous_cursor = (
+            encode_cursor(PREVIOUS, entries[0])
+            if self.has_previous else None
+        )
+        return page
+
+
+class CommentCursorPaginator(CursorPaginator):
+    """Курсорный пагинатор комментариев, новые сверху."""
+    date_field = 'created'
+    ordering = ('-created', '-pk')
+
+    def __init__(self, object_list, per_page=COMMENTS_ON_PAGE):
+        super().__init__(object_list, per_page)
+
+
+class LazyPage(Page):
+    """Страница, которая загружается при первом обращении к ней.
+
+    Если фрагмент ленты нашелся в кеше, шаблон страницу не трогает,
+    и запрос к БД не выполняется. prepare(page) вызывается с загруженной
+    страницей.
+    """
+
+    def __init__(self, paginator, position, prepare=None):
+        self.paginator = paginator
+        self._position = position
+        self._prepare = prepare
+        self._page = None
+
+    def _load(self):
+        if self._page is None:
+            self._page = self.paginator.get_page(self._position)
+            if self._prepare is not None:
+                self._prepare(self._page)
+        return self._page
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+
+def _paginator(request, posts, per_page, date_field):
+    if PAGE_PARAM in request.GET and CURSOR_PARAM not in request.GET:
+        return Paginator(posts, per_page), request.GET.get(PAGE_PARAM)
+    return (CursorPaginator(posts, per_page, date_field),
+            request.GET.get(CURSOR_PARAM))
+
+
+def paginate(request, posts, per_page=POSTS_ON_PAGE, date_field=None):
+    """Возвращает страницу ленты для запроса.
+
+    Старые ссылки вида ?page=N обслуживает обычный Paginator,
+    всё остальное - курсорный, по полю date_field, если оно задано.
+    """
+    paginator, position = _paginator(request, posts, per_page, date_field)
+    return paginator.get_page(position)
+
+
+def paginate_lazily(request, posts, prepare=None, per_page=POSTS_ON_PAGE):
+    """Как paginate(), но страница загружается при первом обращении."""
+    paginator, position = _paginator(request, posts, per_page, None)
+    return LazyPage(paginator, position, prepare)
@@ -0,0 +1,135 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .counters import (change_author_post_count, change_follower_count,
+                       change_group_post_count)
+from .feed_cache import bump, post_scopes
+from .group_feed import forget_snapshots, groups, refresh_snapshots
+from .models import Comment, Follow, Group, Post
+from .timeline import (backfill_timeline, fan_out_post, follower_left,
+                       prune_timeline)
+from .trending import forget_post, rank_comment, rank_post
+
+COUNTED_FIELDS = ('author_id', 'group_id')
+
+
+def _remember_counted(instance):
+    deferred = instance.get_deferred_fields()
+    instance._counted = {
+        field: getattr(instance, field)
+        for field in COUNTED_FIELDS
+        if field not in deferred
+    }
+
+
+@receiver(post_init, sender=Post)
+def remember_counted_fields(sender, instance, **kwargs):
+    """Запоминает автора и группу, с которыми пост был загружен."""
+    _remember_counted(instance)
+
+
+def invalidate_feeds_on_save(instance, created):
+    bump(*post_scopes(instance, None if created else instance._counted))
+
+
+def refresh_group_snapshots_on_save(instance, created):
+    previous = None if created else instance._counted.get(
+        'group_id', instance.group_id)
+    if previous != instance.group_id:
+        refresh_snapshots(previous, instance.group_id)
+
+
+def update_counters_on_save(instance, created):
+    if created:
+        change_author_post_count(instance.author_id, 1)
+        if instance.group_id:
+            change_group_post_count(instance.group_id, 1)
+        fan_out_post(instance)
+        rank_post(instance)
+    else:
+        for field, change in (
+            ('author_id', change_author_post_count),
+            ('group_id', change_group_post_count),
+        ):
+            if field not in instance._counted:
+                continue
+            old, new = instance._counted[field], getattr(instance, field)
+            if old == new:
+                continue
+            if old:
+                change(old, -1)
+            if new:
+                change(new, 1)
+    _remember_counted(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Единственный приемник post_save поста, чтобы порядок шагов
+    не зависел от порядка подключения.
+
+    Сброс лент и снимков групп смотрит на прежние автора и группу,
+    а пересчет счетчиков запоминает новые, поэтому идет последним.
+    """
+    invalidate_feeds_on_save(instance, created)
+    refresh_group_snapshots_on_save(instance, created)
+    update_counters_on_save(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump(*post_scopes(instance), f'comments:{instance.pk}')
+    refresh_snapshots(instance.group_id)
+    change_author_post_count(instance.author_id, -1)
+    if instance.group_id:
+        change_group_post_count(instance.group_id, -1)
+    forget_post(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def fill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        backfill_timeline(instance.user_id, instance.author_id)
+        change_follower_count(instance.author_id, 1)
+        bump(f'follows:{instance.user_id}')
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline_on_unfollow(sender, instance, **kwargs):
+    prune_timeline(instance.user_id, instance.author_id)
+    follower_left(instance.author_id)
+    bump(f'follows:{instance.user_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    bump(f'comments:{instance.post_id}')
+
+
+@receiver(post_save, sender=Comment)
+def rank_on_comment(sender, instance, created, **kwargs):
+    if created:
+        rank_comment(instance)
+
+
+def _group_scopes(group):
+    """Ленты, где видны название или ссылка группы."""
+    return 'index', f'group:{group.pk}'
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        bump(*_group_scopes(instance))
+    groups.forget(instance)
+    if created:
+        # Новая группа может получить pk удаленной.
+        forget_snapshots([instance.pk])
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    bump(*_group_scopes(instance))
+    groups.forget(instance)
+    forget_snapshots([instance.pk])
@@ -0,0 +1,39 @@
+from django import template
+from django.core.cache import cache
+
+from ..feed_cache import FEED_CACHE_TIMEOUT, record
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, fragment):
+        self.nodelist = nodelist
+        self.fragment = fragment
+
+    def render(self, context):
+        fragment = self.fragment.resolve(context)
+        key = fragment.key
+        value = cache.get(key)
+        if value is not None:
+            record(fragment.feed, 'hit')
+            return value
+        record(fragment.feed, 'miss')
+        value = self.nodelist.render(context)
+        cache.set(key, value, FEED_CACHE_TIMEOUT)
+        return value
+
+
+@register.tag
+def feedcache(parser, token):
+    """Кеширует фрагмент ленты по FeedFragment из контекста.
+
+        {% feedcache feed_fragment %} ... {% endfeedcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает один аргумент: фрагмент ленты")
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(nodelist, parser.compile_filter(bits[1]))
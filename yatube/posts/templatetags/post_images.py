@@ -0,0 +1,36 @@
+from django import template
+
+from ..models import IMAGE_FAILED, IMAGE_READY
+from ..thumbnails import built_thumbnails, image_variants
+
+register = template.Library()
+
+# Обложка занимает всю ширину контейнера, а он не шире 960px.
+DEFAULT_SIZES = '(min-width: 992px) 960px, 100vw'
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, upscale=True, sizes=DEFAULT_SIZES):
+    """<picture> с вариантами картинки поста разной ширины и формата.
+
+    Пока картинка не обработана, вместо нее заглушка: оригинал еще
+    с метаданными EXIF.
+    """
+    if not post.image:
+        return {}
+    if post.image_status != IMAGE_READY:
+        return {'placeholder': (
+            'Картинка недоступна' if post.image_status == IMAGE_FAILED
+            else 'Картинка обрабатывается')}
+    built = getattr(post, 'built_thumbnails', None)
+    if built is None:
+        # Пост не прошел через prefetch_thumbnails.
+        name = post.image.name
+        built = built_thumbnails.get_many([name])[name]
+    size = None
+    if post.image_width and post.image_height:
+        size = (post.image_width, post.image_height)
+    return {
+        'sizes': sizes,
+        **image_variants(post.image, built, size, upscale),
+    }
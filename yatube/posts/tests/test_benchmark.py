@@ -0,0 +1,68 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from io import StringIO
+from ..benchmark import dump, load
+from ..models import Comment, Follow, Post, TimelineEntry
+
+import os
+import shutil
+import tempfile
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def test_seed_and_run(self):
+        """Наполнение и прогон дают JSON с замерами всех представлений."""
+        call_command(
+            'seed_benchmark', users=20, groups=2, posts=50, follows=100,
+            comments=200, stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Follow.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertTrue(TimelineEntry.objects.exists())
+        output = os.path.join(self.dir, 'run.json')
+        call_command(
+            'run_benchmark', output=output, repeat=2, warmup=0,
+            stdout=StringIO(),
+        )
+        results = load(output)['results']
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_detail',
+            'follow_index', 'add_comment',
+        })
+        self.assertEqual(results['index']['status'], 200)
+        self.assertEqual(results['add_comment']['status'], 302)
+
+    def test_seed_beyond_sqlite_limits(self):
+        """Пачки больше 500 строк и прогон с лимитами частоты."""
+        call_command(
+            'seed_benchmark', users=600, groups=2, posts=1200, follows=1200,
+            comments=1200, batch_size=5000, stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 1200)
+        self.assertEqual(Comment.objects.count(), 1200)
+        output = os.path.join(self.dir, 'run.json')
+        call_command(
+            'run_benchmark', output=output, repeat=20, warmup=3,
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            load(output)['results']['add_comment']['status'], 302)
+
+    def test_compare_flags_regressions(self):
+        """Рост времени или числа запросов считается регрессией."""
+        baseline = os.path.join(self.dir, 'base.json')
+        current = os.path.join(self.dir, 'current.json')
+        dump({'results': {'index': {'p50_ms': 10, 'queries': 2}}}, baseline)
+        dump({'results': {'index': {'p50_ms': 11, 'queries': 2}}}, current)
+        call_command('compare_benchmarks', baseline, current,
+                     stdout=StringIO())
+        dump({'results': {'index': {'p50_ms': 10, 'queries': 3}}}, current)
+        with self.assertRaises(CommandError):
+            call_command('compare_benchmarks', baseline, current,
+                         stdout=StringIO())
@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import Comment, Post
+from ..paginator import COMMENTS_ON_PAGE
+
+from faker import Faker
+
+User = get_user_model()
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fake = Faker()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = Post.objects.create(
+            text='Пост', author=User.objects.create_user(username='author'))
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create_user(username=f'user{i}'),
+                text=cls.fake.sentence(),
+            )
+            for i in range(COMMENTS_ON_PAGE + 5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_chunk(self):
+        """Страница поста показывает только первую порцию, новые сверху."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.pk for comment in comments],
+            [comment.pk for comment in self.comments[::-1]][
+                :COMMENTS_ON_PAGE],
+        )
+        self.assertContains(response, 'data-comments-more')
+
+    def test_fragment_endpoint_returns_next_chunk(self):
+        """Фрагмент по курсору отдает оставшиеся комментарии."""
+        first = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        cursor = first.context['comments'].next_cursor
+        response = self.guest_client.get(
+            reverse('posts:comments', args=(self.post.pk,)),
+            {'cursor': cursor},
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(
+            [comment.pk for comment in response.context['comments']],
+            [comment.pk for comment in self.comments[4::-1]],
+        )
+        self.assertNotContains(response, 'data-comments-more')
+
+    def test_json_endpoint(self):
+        """Комментарии отдаются в JSON вместе с курсором продолжения."""
+        response = self.guest_client.get(
+            reverse('posts:comments', args=(self.post.pk,)),
+            {'format': 'json'},
+        )
+        data = response.json()
+        self.assertEqual(len(data['comments']), COMMENTS_ON_PAGE)
+        self.assertEqual(data['comments'][0]['id'], self.comments[-1].pk)
+        self.assertEqual(
+            data['comments'][0]['author'], self.comments[-1].author.username)
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_comment_authors_are_joined(self):
+        """Авторы комментариев загружаются одним запросом с комментариями."""
+        with self.assertNumQueries(2):
+            self.guest_client.get(
+                reverse('posts:comments', args=(self.post.pk,)))
+
+    def test_unknown_post_returns_404(self):
+        """Для несуществующего поста отдается 404."""
+        response = self.guest_client.get(
+            reverse('posts:comments', args=(self.post.pk + 1,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
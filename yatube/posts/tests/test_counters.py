@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..counters import change_follower_count, recount_post_counters
+from ..models import AuthorStats, Group, Post
+
+from faker import Faker
+from io import StringIO
+from unittest import mock
+
+User = get_user_model()
+
+
+class PostCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = Faker()
+
+    def setUp(self):
+        self.author = User.objects.create_user(username=self.fake.user_name())
+        self.group = Group.objects.create(
+            title=self.fake.text(),
+            slug=self.fake.slug(),
+            description=self.fake.text(),
+        )
+        self.other_group = Group.objects.create(
+            title=self.fake.text(),
+            slug=f'{self.fake.slug()}-other',
+            description=self.fake.text(),
+        )
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def assertCounters(self, author, group, other_group):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).post_count, author)
+        self.assertEqual(self.group.post_count, group)
+        self.assertEqual(self.other_group.post_count, other_group)
+
+    def test_counters_follow_create_edit_delete(self):
+        """Счетчики следуют за созданием, сменой группы и удалением."""
+        self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': self.fake.text(), 'group': self.group.pk},
+        )
+        post = Post.objects.get(author=self.author)
+        self.assertCounters(1, 1, 0)
+        self.author_client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': post.text, 'group': self.other_group.pk},
+        )
+        self.assertCounters(1, 0, 1)
+        self.author_client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': post.text},
+        )
+        self.assertCounters(1, 0, 0)
+        Post.objects.filter(pk=post.pk).delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_counters_follow_author_cascade(self):
+        """Удаление автора уменьшает счетчики его групп."""
+        Post.objects.create(
+            text=self.fake.text(), author=self.author, group=self.group)
+        self.author.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        """Команда recount_posts чинит разошедшиеся счетчики."""
+        Post.objects.bulk_create([
+            Post(text=self.fake.text(), author=self.author, group=self.group)
+            for _ in range(3)
+        ])
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounters(3, 3, 0)
+        AuthorStats.objects.filter(author=self.author).update(post_count=7)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounters(3, 3, 0)
+
+    def test_recount_creates_stats_beyond_sqlite_limit(self):
+        """Пачки вставки не упираются в предел SQLite на 500 строк."""
+        User.objects.bulk_create([
+            User(username=f'author-{number}') for number in range(600)])
+        authors = User.objects.filter(username__startswith='author-')
+        Post.objects.bulk_create([
+            Post(text=self.fake.text(), author=author) for author in authors])
+        self.assertEqual(recount_post_counters(), (600, 0))
+        self.assertEqual(
+            AuthorStats.objects.filter(post_count=1).count(), 600)
+
+    def test_counter_row_created_concurrently_keeps_delta(self):
+        """Строка счетчика, созданная параллельно, не теряет сдвиг."""
+        AuthorStats.objects.create(author=self.author, follower_count=1)
+        update, calls = QuerySet.update, []
+
+        def racing_update(queryset, **kwargs):
+            # Первый update не видит строку, созданную другим запросом.
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            change_follower_count(self.author.pk, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).follower_count, 2)
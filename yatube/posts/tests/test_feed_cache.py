@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from io import StringIO
+from unittest import mock
+from ..models import AuthorStats, Comment, Group, Post
+from .. import feed_cache
+
+from faker import Faker
+
+User = get_user_model()
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = Faker()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='')
+        self.post = Post.objects.create(
+            text='Первый пост', author=self.author, group=self.group)
+
+    def get(self, view, *args, **params):
+        return self.guest_client.get(
+            reverse(view, args=args), params).content.decode()
+
+    def test_pages_are_cached_separately(self):
+        """Разные страницы ленты не отдают фрагменты друг друга."""
+        for _ in range(10):
+            Post.objects.create(text=self.fake.sentence(), author=self.author)
+        self.assertIn('Первый пост', self.get('posts:index', page=2))
+        self.assertNotIn('Первый пост', self.get('posts:index', page=1))
+        self.assertIn('Первый пост', self.get('posts:index', page=2))
+
+    def test_post_changes_invalidate_feeds(self):
+        """Создание, правка и удаление поста сбрасывают его ленты."""
+        feeds = (
+            ('posts:index',),
+            ('posts:group', self.group.slug),
+            ('posts:profile', self.author.username),
+        )
+        for feed in feeds:
+            self.get(*feed)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for feed in feeds:
+            with self.subTest(feed=feed[0]):
+                self.assertIn('Исправленный пост', self.get(*feed))
+        self.post.delete()
+        for feed in feeds:
+            with self.subTest(feed=feed[0]):
+                self.assertNotIn('Исправленный пост', self.get(*feed))
+
+    def test_group_change_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает и прежнюю группу."""
+        self.get('posts:group', self.group.slug)
+        self.post.group = Group.objects.create(
+            title='Другая', slug='other', description='')
+        self.post.save()
+        self.assertNotIn('Первый пост', self.get('posts:group', 'group'))
+        self.assertIn('Первый пост', self.get('posts:group', 'other'))
+
+    def test_save_steps_see_previous_group(self):
+        """Сброс лент и снимков видит прежнюю группу поста: счетчики,
+        которые запоминают новую, пересчитываются последними.
+        """
+        other = Group.objects.create(title='Другая', slug='other')
+        scope = f'group:{self.group.pk}'
+        before = feed_cache.generation(scope)
+        with mock.patch('posts.signals.refresh_snapshots') as refresh:
+            self.post.group = other
+            self.post.save()
+        self.assertGreater(feed_cache.generation(scope), before)
+        refresh.assert_called_once_with(self.group.pk, other.pk)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).post_count, 1)
+
+    def test_group_change_skips_posts_of_group(self):
+        """Правка группы сбрасывает ее ленту и главную без запроса постов."""
+        scopes = ('index', f'group:{self.group.pk}')
+        before = [feed_cache.generation(scope) for scope in scopes]
+        self.group.title = 'Новое название'
+        with self.assertNumQueries(1):
+            self.group.save()
+        for scope, generation in zip(scopes, before):
+            self.assertGreater(feed_cache.generation(scope), generation)
+
+    def test_comments_invalidate_post_detail(self):
+        """Новый комментарий сразу виден на странице поста."""
+        self.get('posts:post_detail', self.post.pk)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый комментарий')
+        self.assertIn(
+            'Новый комментарий', self.get('posts:post_detail', self.post.pk))
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_hit_and_miss_metrics(self):
+        """Попадания и промахи считаются по лентам."""
+        feed_cache.reset_stats()
+        self.get('posts:index')
+        self.get('posts:index')
+        self.assertEqual(
+            feed_cache.stats()['index'], {'hit': 1, 'miss': 1})
+        out = StringIO()
+        call_command('feed_cache_stats', '--reset', stdout=out)
+        self.assertIn('попаданий 1', out.getvalue())
+        self.assertEqual(
+            feed_cache.stats()['index'], {'hit': 0, 'miss': 0})
+
+    def test_metrics_are_written_in_batches(self):
+        """Рендер фрагмента не пишет в общий кеш на каждый запрос."""
+        feed_cache.reset_stats()
+        for _ in range(5):
+            feed_cache.record('index', 'hit')
+        self.assertIsNone(
+            cache.get(feed_cache.STATS_KEY.format('index', 'hit')))
+        self.assertEqual(feed_cache.stats()['index']['hit'], 5)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_cached_fragment_skips_page_query(self):
+        """При фрагменте из кеша посты страницы не загружаются."""
+        self.get('posts:index')
+        self.get('posts:profile', self.author.username)
+        with self.assertNumQueries(0):
+            self.get('posts:index')
+        # Остаются запросы автора для валидаторов и шапки профиля.
+        with self.assertNumQueries(2):
+            self.get('posts:profile', self.author.username)
+
+    def test_evicted_generation_does_not_revive_old_fragments(self):
+        """Вытесненный счетчик поколения не совпадает со старым."""
+        before = feed_cache.generation('index')
+        cache.delete(feed_cache.GENERATION_KEY.format('index'))
+        self.assertNotEqual(feed_cache.generation('index'), before)
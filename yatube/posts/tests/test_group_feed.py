@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from unittest import mock
+
+from ..group_feed import SNAPSHOT_KEY, groups
+from ..models import Group, Post
+from ..paginator import POSTS_ON_PAGE
+from .. import group_feed
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class GroupFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        groups.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.other = Group.objects.create(
+            title='Другая', slug='other', description='Описание')
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def create_posts(self, count, group=None):
+        return [
+            Post.objects.create(
+                text=f'Пост {number}', author=self.author,
+                group=group or self.group)
+            for number in range(count)
+        ]
+
+    def page(self, slug='group', **params):
+        response = self.guest_client.get(
+            reverse('posts:group', args=(slug,)), params)
+        return response.context['page_obj']
+
+    def walk(self):
+        """Проходит ленту группы по курсорам и возвращает id постов."""
+        seen, page = [], self.page()
+        while True:
+            seen.append([post.pk for post in page])
+            if not page.next_cursor:
+                return seen
+            page = self.page(cursor=page.next_cursor)
+
+    def test_slug_lookup_is_cached(self):
+        self.assertEqual(groups.get('group'), self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.get('group').title, 'Группа')
+
+    def test_group_save_resets_cached_group(self):
+        groups.get('group')
+        self.group.title = 'Новое название'
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertEqual(groups.get('renamed').title, 'Новое название')
+        response = self.guest_client.get(
+            reverse('posts:group', args=('group',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_page_needs_no_queries(self):
+        """Повторная страница группы: снимок и фрагмент из кеша."""
+        self.create_posts(3)
+        self.guest_client.get(reverse('posts:group', args=('group',)))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                reverse('posts:group', args=('group',)))
+        self.assertContains(response, 'Пост 2')
+
+    def test_snapshot_follows_group_membership(self):
+        """Снимок пересобирается, когда пост входит в группу и уходит."""
+        post, = self.create_posts(1)
+        self.assertEqual([entry.pk for entry in group_feed.snapshot(
+            self.group.pk)], [post.pk])
+        self.author_client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': post.text, 'group': self.other.pk})
+        self.assertEqual(group_feed.snapshot(self.group.pk), [])
+        self.assertEqual([p.pk for p in self.page('other')], [post.pk])
+        Post.objects.get(pk=post.pk).delete()
+        self.assertEqual(cache.get(SNAPSHOT_KEY.format(self.other.pk)), [])
+
+    def test_snapshot_skips_edits_within_group(self):
+        post, = self.create_posts(1)
+        with mock.patch.object(group_feed, 'refresh_snapshot') as refresh:
+            post.text = 'Исправленный текст'
+            post.save()
+        refresh.assert_not_called()
+
+    @mock.patch.object(group_feed, 'SNAPSHOT_SIZE', POSTS_ON_PAGE + 5)
+    def test_pages_beyond_snapshot_come_from_database(self):
+        """Страницы по снимку и из БД складываются в одну ленту."""
+        posts = self.create_posts(POSTS_ON_PAGE * 3)
+        expected = [post.pk for post in reversed(posts)]
+        pages = self.walk()
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual(len(pages), 3)
+        second = self.page(cursor=self.page().next_cursor)
+        first = self.page(cursor=second.previous_cursor)
+        self.assertEqual(
+            [post.pk for post in first], expected[:POSTS_ON_PAGE])
+        self.assertIsNone(first.previous_cursor)
+
+    def test_old_page_links_still_work(self):
+        posts = self.create_posts(POSTS_ON_PAGE + 1)
+        self.assertEqual([post.pk for post in self.page(page=2)],
+                         [posts[0].pk])
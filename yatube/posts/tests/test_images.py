@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from io import BytesIO
+from PIL import Image
+from unittest import mock
+from ..feed_cache import generation
+from ..images import process_image
+from ..models import IMAGE_PENDING, IMAGE_READY, Post
+
+import shutil
+import tempfile
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+
+
+def make_image(name='photo.jpeg', size=(3000, 1000), rotated=False):
+    image = Image.new('RGB', size, (200, 100, 50))
+    exif = Image.Exif()
+    exif[0x010F] = 'Камера'
+    if rotated:
+        exif[ORIENTATION] = 6
+    content = BytesIO()
+    image.save(content, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile(
+        name=name, content=content.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, BACKGROUND_WORKERS=0)
+class ImageProcessingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_image_is_rotated_downscaled_and_converted(self):
+        """Картинка поворачивается, уменьшается и теряет EXIF."""
+        post = Post.objects.create(
+            text='Пост', author=self.author, image=make_image(rotated=True))
+        original = post.image.name
+        process_image(post.pk, original)
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, IMAGE_READY)
+        self.assertTrue(post.image.name.endswith('.webp'))
+        self.assertFalse(default_storage.exists(original))
+        self.assertEqual(post.image_height, settings.IMAGE_MAX_SIDE)
+        self.assertLess(post.image_width, post.image_height)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(
+                image.size, (post.image_width, post.image_height))
+            self.assertFalse(image.getexif())
+
+    def test_replaced_image_is_not_overwritten(self):
+        """Результат для уже замененной картинки отбрасывается."""
+        post = Post.objects.create(
+            text='Пост', author=self.author, image=make_image())
+        stale = post.image.name
+        post.image = make_image('new.jpeg', size=(100, 100))
+        post.save()
+        files = default_storage.listdir('posts')[1]
+        process_image(post.pk, stale)
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('new.jpeg'))
+        self.assertEqual(post.image_status, '')
+        self.assertEqual(default_storage.listdir('posts')[1], files)
+
+    def test_feeds_are_reset_after_thumbnails(self):
+        """Ленты сбрасываются, когда миниатюры уже построены."""
+        post = Post.objects.create(
+            text='Пост', author=self.author, image=make_image())
+        scope = f'profile:{self.author.pk}'
+        before, seen = generation(scope), []
+
+        def generate(image_name):
+            seen.append(generation(scope))
+            return 0
+
+        with mock.patch('posts.images.generate_thumbnails', generate):
+            process_image(post.pk, post.image.name)
+        self.assertEqual(seen, [before])
+        self.assertGreater(generation(scope), before)
+
+    def test_unprocessed_image_is_not_served(self):
+        """Пока картинка не обработана, вместо оригинала - заглушка."""
+        cache.clear()
+        post = Post.objects.create(
+            text='Пост', author=self.author, image=make_image(),
+            image_status=IMAGE_PENDING)
+        original = post.image.url
+        url = reverse('posts:post_detail', args=(post.pk,))
+        response = Client().get(url)
+        self.assertNotContains(response, original)
+        self.assertContains(response, 'Картинка обрабатывается')
+        process_image(post.pk, post.image.name)
+        response = Client().get(url)
+        self.assertNotContains(response, 'Картинка обрабатывается')
+        self.assertContains(response, '<picture>')
+
+    def test_create_marks_image_pending(self):
+        """Новая картинка ждет обработки, пока ее не обработал воркер."""
+        self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост', 'image': make_image(size=(100, 100))},
+        )
+        post = Post.objects.get(author=self.author)
+        self.assertEqual(post.image_status, IMAGE_PENDING)
+        self.assertIsNone(post.image_width)
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100 * 100)
+    def test_huge_image_is_rejected(self):
+        """Слишком большая картинка не проходит проверку формы."""
+        response = self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост', 'image': make_image(size=(101, 100))},
+        )
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 0.01 Мпикс.')
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,85 @@
+import re
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import Comment, Follow, Group, Post
+from ..paginator import POSTS_ON_PAGE, CursorPaginator
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'\bSCAN \w+$', re.MULTILINE)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'План запроса SQLite')
+class FeedIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group)
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn('USE TEMP B-TREE', plan)
+        self.assertIsNone(FULL_SCAN.search(plan), plan)
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент читают индекс без полного прохода и сортировки."""
+        window = POSTS_ON_PAGE + 1
+        feed = Post.objects.for_feed().order_by(*CursorPaginator.ordering)
+        queries = {
+            'index': feed[:window],
+            'group': feed.filter(group=self.group)[:window],
+            'profile': feed.filter(author=self.author)[:window],
+            'page': Post.objects.for_feed().filter(
+                author=self.author)[POSTS_ON_PAGE:POSTS_ON_PAGE * 2],
+            'comments': Comment.objects.filter(post=self.post)
+            .select_related('author').order_by('-created', '-pk')[:window],
+            'following': Follow.objects.filter(
+                user=self.reader, author=self.author),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(query=name):
+                self.assertUsesIndex(queryset)
+
+
+class FollowConstraintTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_repeated_follow_keeps_one_row(self):
+        """Повторная подписка не создает дубль и не ломает счетчик."""
+        url = reverse('posts:profile_follow', args=(self.author.username,))
+        self.reader_client.get(url)
+        self.reader_client.get(url)
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .count(), 1)
+        self.assertEqual(self.author.stats.follower_count, 1)
+
+    def test_self_follow_is_ignored(self):
+        """Подписка на себя не создается."""
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=(self.reader.username,)))
+        self.assertFalse(Follow.objects.filter(user=self.reader))
+
+    def test_profile_shows_own_follow_state(self):
+        """Кнопка отписки зависит от подписки текущего пользователя."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.author)
+        response = self.reader_client.get(
+            reverse('posts:profile', args=(self.author.username,)))
+        self.assertFalse(response.context['following'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(
+            reverse('posts:profile', args=(self.author.username,)))
+        self.assertTrue(response.context['following'])
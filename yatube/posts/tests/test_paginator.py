@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import Post
+from ..paginator import CursorPaginator, POSTS_ON_PAGE
+
+from faker import Faker
+
+User = get_user_model()
+NUM_OF_POSTS = POSTS_ON_PAGE * 2 + 5
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = Faker()
+        cls.author = User.objects.create_user(username=cls.fake.last_name())
+        Post.objects.bulk_create([
+            Post(text=cls.fake.paragraph(), author=cls.author)
+            for _ in range(NUM_OF_POSTS)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def walk(self, url):
+        """Проходит ленту по курсорам и возвращает pk постов."""
+        seen = []
+        params = {}
+        while True:
+            response = self.guest_client.get(url, params)
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                return seen
+            params = {'cursor': page_obj.next_cursor}
+
+    def test_cursor_walk_returns_every_post_once(self):
+        """Проход по курсорам выдает все посты ровно один раз по порядку."""
+        seen = self.walk(reverse('posts:index'))
+        expected = list(
+            Post.objects.order_by(*CursorPaginator.ordering)
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_new_post_does_not_shift_next_page(self):
+        """Новый пост не сдвигает уже выданную следующую страницу."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url).context['page_obj']
+        second = self.guest_client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        Post.objects.create(text=self.fake.paragraph(), author=self.author)
+        again = self.guest_client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in second], [post.pk for post in again])
+
+    def test_previous_cursor_returns_to_first_page(self):
+        """Курсор назад возвращает на предыдущую страницу."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url).context['page_obj']
+        second = self.guest_client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        self.assertTrue(second.has_previous())
+        back = self.guest_client.get(
+            url, {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in first], [post.pk for post in back])
+        self.assertFalse(back.has_previous())
+
+    def test_legacy_page_links_work(self):
+        """Старые ссылки ?page=N продолжают работать."""
+        response = self.guest_client.get(
+            reverse('posts:profile', args=(self.author.username,)),
+            {'page': 3}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']),
+            NUM_OF_POSTS - POSTS_ON_PAGE * 2
+        )
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный курсор отдает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'broken'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), POSTS_ON_PAGE)
+        self.assertFalse(page_obj.has_previous())
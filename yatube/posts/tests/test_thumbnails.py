@@ -0,0 +1,197 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from io import StringIO
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from unittest import mock
+from ..feed_cache import generation
+from ..models import IMAGE_READY, Post
+from ..thumbnails import (THUMBNAIL_GEOMETRIES, BuiltThumbnails,
+                          built_thumbnails, delete_thumbnails,
+                          generate_thumbnails, thumbnail_names,
+                          thumbnail_size)
+
+from faker import Faker
+import shutil
+import tempfile
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, BACKGROUND_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = Faker()
+        cls.author = User.objects.create_user(username=cls.fake.user_name())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def make_image(self, name='image.jpeg'):
+        return SimpleUploadedFile(
+            name=name,
+            content=self.fake.image(size=(1024, 768), image_format='jpeg'),
+            content_type='image/jpeg'
+        )
+
+    def test_render_serves_original_until_generated(self):
+        """До генерации отдается оригинал, после - готовая миниатюра."""
+        post = Post.objects.create(
+            text=self.fake.text(), author=self.author,
+            image=self.make_image())
+        geometry, options = THUMBNAIL_GEOMETRIES[0]
+        self.assertEqual(
+            get_thumbnail(post.image, geometry, **options).url,
+            post.image.url)
+        self.assertEqual(
+            generate_thumbnails(post.image.name), len(THUMBNAIL_GEOMETRIES))
+        self.assertEqual(generate_thumbnails(post.image.name), 0)
+        thumbnail = get_thumbnail(post.image, geometry, **options)
+        self.assertNotEqual(thumbnail.url, post.image.url)
+        self.assertTrue(thumbnail.exists())
+
+    def test_generated_thumbnails_reset_feeds(self):
+        """Новые миниатюры сбрасывают фрагменты лент с этим постом."""
+        post = Post.objects.create(
+            text=self.fake.text(), author=self.author,
+            image=self.make_image())
+        scope = f'profile:{self.author.pk}'
+        before = generation(scope)
+        generate_thumbnails(post.image.name)
+        self.assertGreater(generation(scope), before)
+        before = generation(scope)
+        generate_thumbnails(post.image.name)
+        self.assertEqual(generation(scope), before)
+
+    def test_create_and_edit_enqueue_processing(self):
+        """Создание и смена картинки ставят ее обработку в очередь."""
+        with mock.patch('posts.views.enqueue_image') as enqueue:
+            self.author_client.post(
+                reverse('posts:post_create'),
+                {'text': self.fake.text(), 'image': self.make_image()},
+            )
+            post = Post.objects.get(author=self.author)
+            enqueue.assert_called_once_with(post)
+            self.author_client.post(
+                reverse('posts:post_edit', args=(post.pk,)),
+                {'text': self.fake.text()},
+            )
+            self.assertEqual(enqueue.call_count, 1)
+            self.author_client.post(
+                reverse('posts:post_edit', args=(post.pk,)),
+                {'text': post.text, 'image': self.make_image('new.jpeg')},
+            )
+            self.assertEqual(enqueue.call_count, 2)
+
+    def test_generate_thumbnails_command(self):
+        """Команда generate_thumbnails строит недостающие миниатюры."""
+        Post.objects.create(
+            text=self.fake.text(), author=self.author,
+            image=self.make_image())
+        out = StringIO()
+        call_command('generate_thumbnails', workers=1, stdout=out)
+        self.assertIn(
+            f'новых миниатюр: {len(THUMBNAIL_GEOMETRIES)}', out.getvalue())
+
+    def render_image(self, post, upscale):
+        return Template(
+            '{% load post_images %}{% post_image post upscale=upscale %}'
+        ).render(Context({'post': post, 'upscale': upscale}))
+
+    def test_post_image_lists_variants(self):
+        """Тег отдает srcset по форматам и размеры без открытия файлов."""
+        post = Post.objects.create(
+            text=self.fake.text(), author=self.author,
+            image=self.make_image(), image_status=IMAGE_READY)
+        self.assertNotIn('srcset', self.render_image(post, True))
+        generate_thumbnails(post.image.name)
+        post.image_width, post.image_height = 600, 400
+        with mock.patch('PIL.Image.open') as image_open:
+            html = self.render_image(post, True)
+            self.assertIn('type="image/webp"', html)
+            self.assertIn('480w', html)
+            self.assertIn('1440w', html)
+            self.assertIn('width="960" height="339"', html)
+            html = self.render_image(post, False)
+            image_open.assert_not_called()
+        self.assertIn('width="600" height="339"', html)
+        self.assertIn('600w', html)
+        self.assertNotIn('1440w', html)
+
+    def test_variant_size_matches_generated_file(self):
+        """Размер варианта считается так же, как его строит sorl."""
+        post = Post.objects.create(
+            text=self.fake.text(), author=self.author,
+            image=self.make_image())
+        for geometry, options in THUMBNAIL_GEOMETRIES:
+            with self.subTest(geometry=geometry, options=options):
+                default.backend.generate(post.image, geometry, **options)
+                thumbnail = get_thumbnail(post.image, geometry, **options)
+                with Image.open(thumbnail.storage.path(thumbnail.name)) as im:
+                    self.assertEqual(im.size, thumbnail_size(
+                        (1024, 768), tuple(map(int, geometry.split('x'))),
+                        options['upscale']))
+
+    def test_built_thumbnails_are_fetched_in_one_batch(self):
+        """Записи о миниатюрах страницы читаются одним get_many."""
+        names = []
+        for _ in range(3):
+            post = Post.objects.create(
+                text=self.fake.text(), author=self.author,
+                image=self.make_image())
+            generate_thumbnails(post.image.name)
+            names.append(post.image.name)
+        with mock.patch.object(
+            default_storage, 'exists', wraps=default_storage.exists
+        ) as exists, mock.patch.object(
+            cache, 'get_many', wraps=cache.get_many
+        ) as get_many:
+            built = BuiltThumbnails().get_many(names)
+            exists.assert_not_called()
+            get_many.assert_called_once()
+        for name in names:
+            self.assertEqual(built[name], set(thumbnail_names(name)))
+
+    def test_feed_prefetches_thumbnails(self):
+        """Лента один раз узнает миниатюры всех постов страницы."""
+        cache.clear()
+        for _ in range(3):
+            Post.objects.create(
+                text=self.fake.text(), author=self.author,
+                image=self.make_image())
+        with mock.patch.object(
+            built_thumbnails, 'get_many', wraps=built_thumbnails.get_many
+        ) as get_many:
+            self.author_client.get(reverse('posts:index'))
+        get_many.assert_called_once()
+        self.assertEqual(len(get_many.call_args[0][0]), 3)
+
+    def test_replaced_image_thumbnails_are_deleted(self):
+        """Миниатюры замененной картинки удаляются вместе с записью."""
+        post = Post.objects.create(
+            text=self.fake.text(), author=self.author,
+            image=self.make_image())
+        generate_thumbnails(post.image.name)
+        delete_thumbnails(post.image.name)
+        self.assertFalse(any(
+            default_storage.exists(name)
+            for name in thumbnail_names(post.image.name)))
+        self.assertEqual(
+            built_thumbnails.get_many([post.image.name]),
+            {post.image.name: frozenset()})
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from unittest import mock
+from ..models import AuthorStats, Follow, Post, TimelineEntry
+from ..paginator import POSTS_ON_PAGE
+from .. import timeline
+
+from faker import Faker
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = Faker()
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def create_post(self):
+        return Post.objects.create(
+            text=self.fake.paragraph(), author=self.author)
+
+    def feed(self, **params):
+        response = self.reader_client.get(
+            reverse('posts:follow_index'), params)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в материализованную ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = self.create_post()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed(), [post.pk])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту, отписка очищает ее."""
+        posts = [self.create_post() for _ in range(3)]
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,)))
+        self.assertEqual(self.feed(), [post.pk for post in posts[::-1]])
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,)))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    @mock.patch.object(timeline, 'TIMELINE_SLACK', 0)
+    @mock.patch.object(timeline, 'TIMELINE_LENGTH', 2)
+    def test_timeline_is_capped(self):
+        """Лента обрезается до заданной длины."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [self.create_post() for _ in range(4)]
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(user=self.reader)
+                .values_list('post_id', flat=True)),
+            {posts[-1].pk, posts[-2].pk},
+        )
+
+    @mock.patch.object(timeline, 'FANOUT_MAX_FOLLOWERS', 1)
+    def test_popular_author_is_read_on_demand(self):
+        """Посты авторов с большим числом подписчиков читаются при выдаче."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = self.create_post()
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        self.assertEqual(self.feed(), [post.pk])
+
+    def test_cursor_pages_follow_timeline_dates(self):
+        """Страницы ленты листаются курсором по дате записи ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [self.create_post() for _ in range(POSTS_ON_PAGE + 2)]
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        page = response.context['page_obj']
+        self.assertEqual(
+            [post.pk for post in page] + self.feed(cursor=page.next_cursor),
+            [post.pk for post in reversed(posts)],
+        )
+
+    @override_settings(BACKGROUND_WORKERS=0)
+    @mock.patch.object(timeline, 'FANOUT_MAX_FOLLOWERS', 2)
+    @mock.patch.object(
+        timeline.transaction, 'on_commit', side_effect=lambda func: func())
+    def test_author_below_threshold_fills_timelines(self, on_commit):
+        """Посты, написанные при большом числе подписчиков, остаются
+        в ленте, когда подписчиков становится меньше порога.
+        """
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = self.create_post()
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        Follow.objects.filter(user=other).delete()
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).follower_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed(), [post.pk])
@@ -0,0 +1,166 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from io import StringIO
+from unittest import mock
+
+from search.backends import get_backend
+from ..models import (IMAGE_PENDING, AuthorStats, Comment, Follow, Group,
+                      Post, User)
+from .. import timeline
+
+import json
+import os
+import shutil
+import tempfile
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.post = Post.objects.create(
+            text='Пост, с "кавычками"', author=self.author, group=self.group)
+        Post.objects.create(text='Без группы', author=self.reader)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by('username').values_list(
+                'username', 'first_name')),
+            list(Group.objects.values_list('slug', 'title', 'description')),
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'author__username', 'group__slug', 'pub_date', 'text')),
+            list(Comment.objects.values_list(
+                'pk', 'post_id', 'author__username', 'created', 'text')),
+            list(Follow.objects.values_list(
+                'user__username', 'author__username')),
+        )
+
+    def round_trip(self, path, *options):
+        expected = self.snapshot()
+        call_command('export_yatube', path, *options, stderr=StringIO())
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        call_command(
+            'import_yatube', path, *options, '--batch-size', '1',
+            stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        self.assertEqual(
+            AuthorStats.objects.get(author__username='author').follower_count,
+            1)
+        self.assertEqual(Group.objects.get().post_count, 1)
+
+    def test_ndjson_round_trip(self):
+        """Выгрузка NDJSON загружается обратно без потерь."""
+        path = os.path.join(self.dir, 'dump.ndjson')
+        self.round_trip(path)
+        reader = User.objects.get(username='reader')
+        self.assertEqual(
+            list(reader.timeline.values_list('post__text', flat=True)),
+            ['Пост, с "кавычками"'])
+
+    def test_csv_round_trip(self):
+        """Выгрузка CSV загружается обратно без потерь."""
+        self.round_trip(os.path.join(self.dir, 'csv'), '--format', 'csv')
+
+    def test_import_into_filled_tables_is_refused(self):
+        """Посты со своими id не загружаются поверх существующих."""
+        path = os.path.join(self.dir, 'dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        expected = self.snapshot()
+        with self.assertRaisesMessage(CommandError, 'post'):
+            call_command('import_yatube', path, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_large_batches_fit_sqlite_limits(self):
+        """Пачка по умолчанию больше, чем SQLite примет одним INSERT."""
+        Post.objects.all().delete()
+        path = os.path.join(self.dir, 'dump.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            for number in range(1, 1201):
+                file.write(json.dumps({
+                    'model': 'post', 'id': number, 'author': 'author',
+                    'group': 'group', 'text': f'Пост {number}',
+                    'pub_date': '2022-01-01T00:00:00+00:00', 'image': '',
+                }) + '\n')
+            file.write(json.dumps({
+                'model': 'follow', 'user': 'reader', 'author': 'author',
+            }) + '\n')
+        call_command('import_yatube', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1200)
+        self.assertEqual(Group.objects.get().post_count, 1200)
+        self.assertEqual(self.reader.timeline.count(), 1000)
+
+    def test_unknown_author_is_reported(self):
+        """Пост неизвестного автора останавливает загрузку с ошибкой."""
+        Post.objects.all().delete()
+        path = os.path.join(self.dir, 'dump.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({
+                'model': 'post', 'id': 100, 'author': 'ghost', 'group': None,
+                'pub_date': '2022-01-01T00:00:00+00:00', 'text': 'Пост',
+                'image': '',
+            }) + '\n')
+        with self.assertRaisesMessage(CommandError, 'ghost'):
+            call_command('import_yatube', path, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(pk=100).exists())
+
+    def write_dump(self, *records):
+        path = os.path.join(self.dir, 'dump.ndjson')
+        with open(path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+        return path
+
+    def test_imported_records_are_searchable(self):
+        """Загрузка без сигналов все равно пополняет поисковый индекс."""
+        Post.objects.all().delete()
+        path = self.write_dump(
+            {'model': 'post', 'id': 100, 'author': 'author', 'group': None,
+             'pub_date': '2022-01-01T00:00:00+00:00', 'text': 'Про котов',
+             'image': ''},
+            {'model': 'comment', 'id': 200, 'post': 100, 'author': 'reader',
+             'created': '2022-01-01T00:00:00+00:00', 'text': 'Про собак'},
+        )
+        get_backend().clear()
+        call_command('import_yatube', path, stdout=StringIO())
+        for word in ('котов', 'собак'):
+            self.assertEqual(
+                [post.pk for post in get_backend().search(word)], [100])
+
+    @mock.patch.object(timeline, 'FANOUT_MAX_FOLLOWERS', 2)
+    def test_popular_authors_are_not_backfilled(self):
+        """Посты автора с порогом подписчиков не раскладываются по лентам."""
+        Follow.objects.all().delete()
+        readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(2)
+        ]
+        path = self.write_dump(*(
+            {'model': 'follow', 'user': reader.username, 'author': 'author'}
+            for reader in readers
+        ))
+        call_command('import_yatube', path, stdout=StringIO())
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).follower_count, 2)
+        self.assertFalse(readers[1].timeline.exists())
+
+    def test_imported_images_wait_for_processing(self):
+        Post.objects.all().delete()
+        path = self.write_dump(
+            {'model': 'post', 'id': 100, 'author': 'author', 'group': None,
+             'pub_date': '2022-01-01T00:00:00+00:00', 'text': 'Пост',
+             'image': 'posts/cat.jpg'},
+        )
+        out = StringIO()
+        call_command('import_yatube', path, stdout=out)
+        self.assertEqual(Post.objects.get().image_status, IMAGE_PENDING)
+        self.assertIn('process_images', out.getvalue())
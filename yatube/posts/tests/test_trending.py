@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from io import StringIO
+from unittest import mock
+
+from ..models import AuthorStats, Comment, Follow, Post, TrendingScore
+from .. import trending
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # TestCase не коммитит: колбэки после коммита выполняются сразу.
+        on_commit = mock.patch.object(
+            trending.transaction, 'on_commit', side_effect=lambda f: f())
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.guest_client = Client()
+
+    def create_post(self, text='Пост'):
+        return Post.objects.create(text=text, author=self.author)
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(
+                text='Комментарий', post=post, author=self.reader)
+
+    def score(self, post):
+        return TrendingScore.objects.get(post=post).score
+
+    def feed(self):
+        response = self.guest_client.get(reverse('posts:trending'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_log_add_matches_plain_sum(self):
+        self.assertAlmostEqual(
+            trending.log_add(3, 5), 5 + trending.math.log2(1.25))
+        self.assertAlmostEqual(trending.log_add(1000, 1000), 1001)
+
+    def test_older_events_weigh_less(self):
+        """Вес события затухает вдвое за HALF_LIFE."""
+        now = timezone.now()
+        earlier = now - timedelta(seconds=trending.HALF_LIFE)
+        self.assertAlmostEqual(
+            trending.boost(1, now) - trending.boost(1, earlier), 1)
+
+    def test_comments_raise_post(self):
+        """Комментарии поднимают пост выше более нового."""
+        older, newer = self.create_post('Старый'), self.create_post('Новый')
+        self.assertEqual(self.feed(), [newer.pk, older.pk])
+        before = self.score(older)
+        self.comment(older, 3)
+        self.assertGreater(self.score(older), before)
+        self.assertEqual(self.feed(), [older.pk, newer.pk])
+
+    def test_follower_reach_raises_new_post(self):
+        popular = User.objects.create_user(username='popular')
+        for number in range(6):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'fan{number}'),
+                author=popular)
+        self.assertEqual(AuthorStats.objects.get(
+            author=popular).follower_count, 6)
+        popular_post = Post.objects.create(text='Пост', author=popular)
+        post = self.create_post()
+        self.assertGreater(self.score(popular_post), self.score(post))
+
+    def test_page_reads_cached_top(self):
+        """Страница берет список лучших из кеша и посты одним запросом."""
+        posts = [self.create_post() for _ in range(3)]
+        self.feed()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.feed(), [post.pk for post in reversed(posts)])
+
+    def test_recompute_matches_incremental_scores(self):
+        posts = [self.create_post() for _ in range(3)]
+        self.comment(posts[0], 2)
+        incremental = {post.pk: self.score(post) for post in posts}
+        cache.clear()
+        out = StringIO()
+        call_command('recompute_trending', stdout=out)
+        self.assertIn('Пересчитано рейтингов: 3', out.getvalue())
+        for post in posts:
+            self.assertAlmostEqual(self.score(post), incremental[post.pk])
+        self.assertEqual(trending.top_ids()[0], posts[0].pk)
+
+    def test_recompute_drops_stale_posts(self):
+        stale = self.create_post()
+        Post.objects.filter(pk=stale.pk).update(
+            pub_date=timezone.now() - trending.WINDOW - timedelta(days=1))
+        fresh = self.create_post()
+        trending.recompute()
+        self.assertEqual(trending.top_ids(), [fresh.pk])
+
+    def test_deleted_post_leaves_cached_top(self):
+        """Удаленный пост убирается из списка лучших в кеше."""
+        kept, deleted = self.create_post(), self.create_post()
+        self.feed()
+        deleted.delete()
+        self.assertEqual(trending.top_ids(), [kept.pk])
+
+    def test_recompute_beyond_sqlite_limits(self):
+        """Пересчет пишет больше 500 рейтингов пачками по умолчанию."""
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.author) for _ in range(600))
+        self.assertEqual(trending.recompute(), 600)
+        self.assertEqual(TrendingScore.objects.count(), 600)
+
+    def test_recompute_writes_in_short_transactions(self):
+        """Рейтинги пишутся пачками, уже записанные обновляются."""
+        posts = [self.create_post() for _ in range(5)]
+        self.comment(posts[0], 2)
+        expected = {post.pk: self.score(post) for post in posts}
+        TrendingScore.objects.filter(pk=posts[1].pk).delete()
+        atomic = transaction.atomic
+        with mock.patch.object(
+                trending.transaction, 'atomic', wraps=atomic) as blocks:
+            self.assertEqual(trending.recompute(batch_size=2), 5)
+        # Своя транзакция на каждую пачку из двух рейтингов.
+        self.assertEqual(blocks.call_args_list.count(mock.call()), 3)
+        for post in posts:
+            self.assertAlmostEqual(self.score(post), expected[post.pk])
+
+    @mock.patch.object(trending, 'TOP_SIZE', 2)
+    def test_top_keeps_best_posts(self):
+        """Пост, обогнавший последний в списке лучших, попадает в него."""
+        posts = [self.create_post() for _ in range(3)]
+        self.assertEqual(trending.top_ids(), [posts[2].pk, posts[1].pk])
+        self.comment(posts[0], 5)
+        self.assertEqual(trending.top_ids(), [posts[0].pk, posts[2].pk])
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
 from ..models import Post, Group
@@ -40,6 +41,7 @@ class PostURLTests(TestCase):
         cls.unexisting_url = '/unexisting_page/'
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
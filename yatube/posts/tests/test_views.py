@@ -17,7 +17,7 @@ NUM_OF_POSTS = POSTS_ON_PAGE + POSTS_ON_SECONG_PAGE
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, BACKGROUND_WORKERS=0)
 class PostViewTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -94,6 +94,7 @@ class PostViewTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -222,16 +223,16 @@ class PostViewTests(TestCase):
         )
 
     def test_cache_index_page(self):
-        """Кеширование на главной странице работает."""
+        """Главная отдается из кеша, пока посты не менялись."""
         view, args, _ = self.index_url
         response = self.guest_client.get(reverse(view, args=args))
         res_1 = response.content
-        post = Post.objects.get(pk=self.post.pk)
-        post.delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Мимо сигналов')
         response = self.guest_client.get(reverse(view, args=args))
         res_2 = response.content
         self.assertTrue(res_1 == res_2)
-        cache.clear()
+        post = Post.objects.get(pk=self.post.pk)
+        post.delete()
         response = self.guest_client.get(reverse(view, args=args))
         res_2 = response.content
         self.assertTrue(res_1 != res_2)
@@ -298,3 +299,50 @@ class PostViewTests(TestCase):
             response_follower.context.get('page_obj').object_list[0].text
         )
         self.assertFalse(response_user.context['page_obj'].object_list)
+
+
+class FeedQueryCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = Faker()
+        cls.user = User.objects.create_user(username=cls.fake.last_name())
+        cls.author = User.objects.create_user(username=cls.fake.user_name())
+        authors = [cls.author] + [
+            User.objects.create_user(username=f'{cls.fake.user_name()}{i}')
+            for i in range(POSTS_ON_PAGE)
+        ]
+        cls.group = Group.objects.create(
+            title=cls.fake.text(),
+            slug=cls.fake.slug(),
+            description=cls.fake.text(),
+        )
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+        for i in range(NUM_OF_POSTS):
+            Post.objects.create(
+                text=cls.fake.paragraph(),
+                author=authors[i % len(authors)],
+                group=cls.group,
+            )
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feed_views_query_count(self):
+        """Число запросов лент не зависит от числа постов на странице."""
+        # Группа, автор и пост сначала ищутся для проверки ETag.
+        views_queries = (
+            (reverse('posts:index'), 3),
+            (reverse('posts:group', args=(self.group.slug,)), 5),
+            (reverse('posts:profile', args=(self.author.username,)), 6),
+            (reverse('posts:follow_index'), 4),
+            (reverse('posts:post_detail', args=(self.post.pk,)), 5),
+        )
+        for url, queries in views_queries:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.authorized_client.get(url)
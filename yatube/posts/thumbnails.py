@@ -0,0 +1,262 @@
+import logging
+import threading
+from collections import OrderedDict
+from hashlib import md5
+from time import monotonic
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import toint
+from sorl.thumbnail.images import ImageFile
+
+from core.profiling import track
+from .feed_cache import bump, post_scopes
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Ширины вариантов для srcset; высота - по пропорции обложки 960x339.
+THUMBNAIL_SIZES = ((480, 170), (960, 339), (1440, 508))
+# Вариант по умолчанию для src.
+DEFAULT_SIZE = (960, 339)
+# Форматы вариантов в порядке предпочтения; последний - запасной для <img>.
+THUMBNAIL_FORMATS = (('WEBP', 'image/webp'), ('JPEG', 'image/jpeg'))
+# Все сочетания размера и опций, с которыми шаблоны запрашивают миниатюры.
+THUMBNAIL_GEOMETRIES = tuple(
+    (f'{width}x{height}',
+     {'crop': 'center', 'upscale': upscale, 'format': image_format})
+    for upscale in (True, False)
+    for width, height in THUMBNAIL_SIZES
+    for image_format, _ in THUMBNAIL_FORMATS
+)
+
+# Записи о построенных миниатюрах: в общем кеше и в LRU процесса.
+BUILT_KEY = 'thumbnails:built:{}'
+BUILT_TIMEOUT = 60 * 60 * 24
+# Пока построены не все миниатюры, запись живет недолго: их достраивает
+# воркер, возможно, в другом процессе.
+INCOMPLETE_TIMEOUT = 60
+LRU_SIZE = 1000
+LRU_TIMEOUT = 60
+
+
+class PregeneratedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который не строит миниатюры в запросе.
+
+    Готовая миниатюра отдается по имени файла без обращения к KV-хранилищу,
+    пока ее нет - отдается оригинал. Строит миниатюры generate().
+    """
+
+    def _resolve(self, file_, geometry_string, options):
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return source, ImageFile(name, default.storage), options
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with track('thumbnail'):
+            source, thumbnail, _ = self._resolve(
+                file_, geometry_string, options)
+            return thumbnail if thumbnail.exists() else source
+
+    def generate(self, file_, geometry_string, **options):
+        """Строит миниатюру, если ее еще нет. Возвращает True, если строил."""
+        source, thumbnail, options = self._resolve(
+            file_, geometry_string, options)
+        if thumbnail.exists():
+            return False
+        source_image = default.engine.get_image(source)
+        try:
+            options['image_info'] = default.engine.get_image_info(
+                source_image)
+            self._create_thumbnail(
+                source_image, geometry_string, options, thumbnail)
+        finally:
+            default.engine.cleanup(source_image)
+        return True
+
+
+def thumbnail_names(image_name):
+    """Имена файлов всех миниатюр картинки; хранилище не трогается."""
+    source = ImageFile(image_name, default_storage)
+    return [
+        default.backend._resolve(source, geometry, dict(options))[1].name
+        for geometry, options in THUMBNAIL_GEOMETRIES
+    ]
+
+
+class BuiltThumbnails:
+    """Какие миниатюры картинок уже построены.
+
+    По записи на картинку в общем кеше, последние записи - еще и в LRU
+    процесса. Все картинки страницы проверяются одним get_many(),
+    а файлы проверяются, только если записи нет нигде.
+    """
+
+    def __init__(self, size=LRU_SIZE, timeout=LRU_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _key(self, image_name):
+        return BUILT_KEY.format(md5(image_name.encode()).hexdigest())
+
+    def _remember(self, image_name, built):
+        with self.lock:
+            self.local[image_name] = (monotonic() + self.timeout, built)
+            self.local.move_to_end(image_name)
+            while len(self.local) > self.size:
+                self.local.popitem(last=False)
+
+    def _from_local(self, image_names):
+        found, now = {}, monotonic()
+        with self.lock:
+            for name in image_names:
+                expires, built = self.local.get(name, (0, None))
+                if expires > now:
+                    self.local.move_to_end(name)
+                    found[name] = built
+        return found
+
+    def scan(self, image_name):
+        """Проверяет файлы миниатюр и обновляет запись."""
+        built = frozenset(
+            name for name in thumbnail_names(image_name)
+            if default_storage.exists(name))
+        complete = len(built) == len(THUMBNAIL_GEOMETRIES)
+        cache.set(
+            self._key(image_name), built,
+            BUILT_TIMEOUT if complete else INCOMPLETE_TIMEOUT)
+        self._remember(image_name, built)
+        return built
+
+    def get_many(self, image_names):
+        """{картинка: frozenset имен построенных миниатюр}."""
+        with track('thumbnail'):
+            found = self._from_local(image_names)
+            missing = {
+                self._key(name): name
+                for name in image_names if name not in found
+            }
+            if not missing:
+                return found
+            cached = cache.get_many(missing)
+            for key, name in missing.items():
+                if key in cached:
+                    found[name] = cached[key]
+                    self._remember(name, cached[key])
+                else:
+                    found[name] = self.scan(name)
+            return found
+
+    def forget(self, image_name):
+        cache.delete(self._key(image_name))
+        with self.lock:
+            self.local.pop(image_name, None)
+
+
+built_thumbnails = BuiltThumbnails()
+
+
+def prefetch_thumbnails(posts):
+    """Узнает построенные миниатюры всех постов страницы разом."""
+    posts = [post for post in posts if post.image]
+    built = built_thumbnails.get_many({post.image.name for post in posts})
+    for post in posts:
+        post.built_thumbnails = built[post.image.name]
+
+
+def generate_thumbnails(image_name):
+    """Строит все миниатюры, нужные шаблонам. Возвращает число новых."""
+    source = ImageFile(image_name, default_storage)
+    created = 0
+    for geometry, options in THUMBNAIL_GEOMETRIES:
+        created += default.backend.generate(source, geometry, **options)
+    built_thumbnails.scan(image_name)
+    if created:
+        bump_image_feeds(image_name)
+    return created
+
+
+def bump_image_feeds(image_name):
+    """Сбрасывает фрагменты лент, где показаны посты с этой картинкой."""
+    scopes = set()
+    for post in Post.objects.filter(image=image_name).only(
+            'author_id', 'group_id'):
+        scopes |= post_scopes(post)
+    if scopes:
+        bump(*scopes)
+
+
+def delete_thumbnails(image_name):
+    """Удаляет миниатюры замененной картинки и запись о них."""
+    for name in thumbnail_names(image_name):
+        default_storage.delete(name)
+    built_thumbnails.forget(image_name)
+
+
+def thumbnail_size(size, geometry, upscale):
+    """Размер миниатюры с обрезкой по центру, как его считает sorl."""
+    (width, height), (box_width, box_height) = size, geometry
+    factor = max(box_width / width, box_height / height)
+    if factor < 1 or upscale:
+        width, height = toint(width * factor), toint(height * factor)
+    return min(width, box_width), min(height, box_height)
+
+
+def image_variants(image, built, size=None, upscale=True):
+    """Готовые варианты картинки для <picture>.
+
+    built - имена построенных миниатюр из BuiltThumbnails, size -
+    сохраненные (ширина, высота) оригинала: по ним считаются размеры
+    вариантов, файлы при этом не открываются. Возвращает sources -
+    [(MIME-тип, srcset)] и src, width, height для <img>; пока вариантов
+    нет, отдается оригинал.
+    """
+    sources, src = [], (image.url, *(size or (None, None)))
+    for image_format, mime in THUMBNAIL_FORMATS:
+        srcset, widths = [], set()
+        for geometry in THUMBNAIL_SIZES:
+            _, thumbnail, _ = default.backend._resolve(
+                image, '{}x{}'.format(*geometry), {
+                    'crop': 'center', 'upscale': upscale,
+                    'format': image_format,
+                })
+            if thumbnail.name not in built:
+                continue
+            width, height = (
+                thumbnail_size(size, geometry, upscale) if size
+                else geometry)
+            if geometry == DEFAULT_SIZE:
+                src = (thumbnail.url, width, height)
+            if width not in widths:
+                widths.add(width)
+                srcset.append(f'{thumbnail.url} {width}w')
+        if srcset:
+            sources.append((mime, ', '.join(srcset)))
+    url, width, height = src
+    if not upscale and not size:
+        # Без размеров оригинала размеры варианта неизвестны.
+        width = height = None
+    return {
+        'sources': sources, 'src': url, 'width': width, 'height': height}
+
+
+def safe_generate_thumbnails(image_name):
+    try:
+        return generate_thumbnails(image_name)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры %s', image_name)
+        return 0
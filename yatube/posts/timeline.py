@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from core.background import run_in_background
+
+from .bulk import insert_batches
+from .counters import change_follower_count
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+TIMELINE_LENGTH = 1000
+TIMELINE_SLACK = 100
+FANOUT_MAX_FOLLOWERS = 1000
+FANOUT_BATCH_SIZE = 500
+# Поле даты ленты, по которому ее листает курсорный пагинатор.
+TIMELINE_DATE = 'feed_date'
+
+
+def is_fanned_out(author_id):
+    """Посты автора раскладываются по лентам, если подписчиков немного."""
+    return not AuthorStats.objects.filter(
+        author_id=author_id,
+        follower_count__gte=FANOUT_MAX_FOLLOWERS,
+    ).exists()
+
+
+def trim_timelines(user_ids):
+    """Обрезает переполненные ленты до TIMELINE_LENGTH записей.
+
+    Ленты обрезаются с запасом TIMELINE_SLACK, чтобы не удалять
+    по записи на каждый новый пост.
+    """
+    overfull = (
+        TimelineEntry.objects.filter(user_id__in=user_ids)
+        .values_list('user_id', flat=True)
+        .annotate(entries=Count('pk'))
+        .filter(entries__gt=TIMELINE_LENGTH + TIMELINE_SLACK)
+    )
+    for user_id in overfull:
+        timeline = TimelineEntry.objects.filter(user_id=user_id)
+        # Удаляется все, что старше последней оставляемой записи.
+        pub_date, post_id = timeline.order_by(
+            '-pub_date', '-post_id').values_list(
+            'pub_date', 'post_id')[TIMELINE_LENGTH - 1]
+        timeline.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lt=post_id)
+        ).delete()
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if not is_fanned_out(post.author_id):
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids
+        ),
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines(follower_ids)
+
+
+def backfill_timelines(follows):
+    """Добавляет в ленты последние посты авторов по парам (читатель, автор).
+
+    Посты читаются одним запросом на автора, а не на подписку, и пишутся
+    пачками. Авторы, чьи посты не раскладываются по лентам, пропускаются.
+    """
+    readers = defaultdict(set)
+    for user_id, author_id in follows:
+        readers[author_id].add(user_id)
+    unfanned = set(
+        AuthorStats.objects.filter(
+            author_id__in=list(readers),
+            follower_count__gte=FANOUT_MAX_FOLLOWERS,
+        ).values_list('author_id', flat=True)
+    )
+
+    def entries():
+        for author_id, user_ids in readers.items():
+            if author_id in unfanned:
+                continue
+            posts = list(
+                Post.objects.filter(author_id=author_id)
+                .order_by('-pub_date', '-pk')
+                .values_list('pk', 'pub_date')[:TIMELINE_LENGTH]
+            )
+            for user_id in user_ids:
+                for pk, pub_date in posts:
+                    yield TimelineEntry(
+                        user_id=user_id, post_id=pk, pub_date=pub_date)
+
+    insert_batches(
+        TimelineEntry, entries(), FANOUT_BATCH_SIZE,
+        report=lambda message: None, ignore_conflicts=True)
+    trim_timelines(set().union(*readers.values()))
+
+
+def backfill_timeline(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    backfill_timelines([(user_id, author_id)])
+
+
+def refill_followers(author_id):
+    """Раскладывает последние посты автора по лентам всех подписчиков."""
+    backfill_timelines(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', 'author_id').iterator())
+
+
+def follower_left(author_id):
+    """Уменьшает счетчик подписчиков автора после отписки.
+
+    Пока подписчиков было не меньше FANOUT_MAX_FOLLOWERS, посты автора
+    читались при выдаче ленты и в ленты не попадали. Отписка, которая
+    опускает автора ниже порога, после коммита раскладывает их по лентам
+    оставшихся подписчиков. Условный update срабатывает ровно у одной
+    такой отписки.
+    """
+    crossed = AuthorStats.objects.filter(
+        author_id=author_id, follower_count=FANOUT_MAX_FOLLOWERS,
+    ).update(follower_count=F('follower_count') - 1)
+    if not crossed:
+        change_follower_count(author_id, -1)
+        return
+    transaction.on_commit(
+        lambda: run_in_background(refill_followers, author_id))
+
+
+def prune_timeline(user_id, author_id):
+    """Убирает из ленты отписавшегося пользователя посты автора."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+def timeline_posts(user):
+    """Лента подписок: материализованная лента плюс посты авторов,
+    чьи посты не раскладываются по лентам из-за числа подписчиков.
+
+    Дата ленты в поле TIMELINE_DATE: без авторов, читаемых при выдаче,
+    это дата записи ленты, и страница берется по индексу
+    timeline_user_date_idx.
+    """
+    posts = Post.objects.for_feed()
+    unfanned_authors = Follow.objects.filter(
+        user=user,
+        author__stats__follower_count__gte=FANOUT_MAX_FOLLOWERS,
+    ).values('author_id')
+    if not unfanned_authors.exists():
+        return posts.filter(timeline_entries__user=user).annotate(
+            **{TIMELINE_DATE: F('timeline_entries__pub_date')})
+    return posts.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=unfanned_authors)
+    ).annotate(**{TIMELINE_DATE: F('pub_date')})
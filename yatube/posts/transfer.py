@@ -0,0 +1,256 @@
+"""Потоковые выгрузка и загрузка пользователей, групп, постов,
+комментариев и подписок в NDJSON и CSV.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from time import perf_counter
+
+from django.utils.dateparse import parse_datetime
+
+from search.backends import get_backend
+from search.backends.base import COMMENT, POST
+from .bulk import explicit_dates, insert_batches
+from .counters import recount_follower_counts, recount_post_counters
+from .feed_cache import bump
+from .group_feed import forget_snapshots
+from .models import IMAGE_PENDING, Comment, Follow, Group, Post, User
+from .timeline import backfill_timelines
+from .trending import recompute as recompute_trending
+
+MODELS = ('user', 'group', 'post', 'comment', 'follow')
+FIELDS = {
+    'user': ('username', 'first_name', 'last_name'),
+    'group': ('slug', 'title', 'description'),
+    'post': ('id', 'author', 'group', 'pub_date', 'text', 'image'),
+    'comment': ('id', 'post', 'author', 'created', 'text'),
+    'follow': ('user', 'author'),
+}
+MODEL_CLASSES = {
+    'user': User, 'group': Group, 'post': Post,
+    'comment': Comment, 'follow': Follow,
+}
+FORMATS = ('ndjson', 'csv')
+BATCH_SIZE = 5000
+
+
+def _querysets():
+    return {
+        'user': User.objects.values_list(
+            'username', 'first_name', 'last_name'),
+        'group': Group.objects.values_list('slug', 'title', 'description'),
+        'post': Post.objects.values_list(
+            'pk', 'author__username', 'group__slug', 'pub_date', 'text',
+            'image'),
+        'comment': Comment.objects.values_list(
+            'pk', 'post_id', 'author__username', 'created', 'text'),
+        'follow': Follow.objects.values_list(
+            'user__username', 'author__username'),
+    }
+
+
+def _dump(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def export_rows(model, batch_size=BATCH_SIZE):
+    """Строки модели по порядку ключей; БД читается курсором пачками."""
+    queryset = _querysets()[model].order_by('pk')
+    for row in queryset.iterator(chunk_size=batch_size):
+        yield tuple(_dump(value) for value in row)
+
+
+def _report_rate(report, model, total, started):
+    elapsed = perf_counter() - started
+    report(f'{model}: {total} строк, '
+           f'{total / elapsed if elapsed else 0:.0f} строк/с')
+
+
+def write_ndjson(stream, models=MODELS, batch_size=BATCH_SIZE, report=print):
+    """Пишет записи в поток по строке JSON на объект."""
+    for model in models:
+        total, started = 0, perf_counter()
+        for row in export_rows(model, batch_size):
+            record = {'model': model, **dict(zip(FIELDS[model], row))}
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+            total += 1
+        _report_rate(report, model, total, started)
+
+
+def write_csv(directory, models=MODELS, batch_size=BATCH_SIZE, report=print):
+    """Пишет каждую модель в свой <модель>.csv в папке directory."""
+    os.makedirs(directory, exist_ok=True)
+    for model in models:
+        total, started = 0, perf_counter()
+        path = os.path.join(directory, f'{model}.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(FIELDS[model])
+            for row in export_rows(model, batch_size):
+                writer.writerow(row)
+                total += 1
+        _report_rate(report, model, total, started)
+
+
+def read_ndjson(stream):
+    """Пары (модель, запись) из потока NDJSON по одной строке."""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield record.pop('model'), record
+        except (ValueError, KeyError):
+            raise ValueError(f'Строка {number}: ожидается JSON с полем model.')
+
+
+def read_csv(directory):
+    """Пары (модель, запись) из файлов <модель>.csv, какие есть в папке."""
+    for model in MODELS:
+        path = os.path.join(directory, f'{model}.csv')
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as file:
+            for record in csv.DictReader(file):
+                yield model, record
+
+
+class Lookups:
+    """Таблицы в памяти для поиска ключей авторов и групп по имени и slug.
+
+    Таблица строится одним запросом при первом обращении и сбрасывается,
+    когда загружены новые пользователи или группы.
+    """
+    sources = {'user': (User, 'username'), 'group': (Group, 'slug')}
+
+    def __init__(self):
+        self.tables = {}
+
+    def reset(self, model):
+        self.tables.pop(model, None)
+
+    def pk(self, model, key):
+        if not key:
+            return None
+        if model not in self.tables:
+            source, field = self.sources[model]
+            self.tables[model] = dict(
+                source.objects.values_list(field, 'pk').iterator())
+        try:
+            return self.tables[model][key]
+        except KeyError:
+            raise ValueError(f'Не найден {model} «{key}».')
+
+
+def _build(model, record, lookups):
+    if model == 'user':
+        return User(
+            username=record['username'],
+            first_name=record.get('first_name') or '',
+            last_name=record.get('last_name') or '',
+            password='!',
+        )
+    if model == 'group':
+        return Group(
+            slug=record['slug'],
+            title=record['title'],
+            description=record.get('description') or '',
+        )
+    if model == 'post':
+        return Post(
+            pk=int(record['id']),
+            author_id=lookups.pk('user', record['author']),
+            group_id=lookups.pk('group', record.get('group')),
+            pub_date=parse_datetime(record['pub_date']),
+            text=record['text'],
+            image=record.get('image') or '',
+            image_status=IMAGE_PENDING if record.get('image') else '',
+        )
+    if model == 'comment':
+        return Comment(
+            pk=int(record['id']),
+            post_id=int(record['post']),
+            author_id=lookups.pk('user', record['author']),
+            created=parse_datetime(record['created']),
+            text=record['text'],
+        )
+    return Follow(
+        user_id=lookups.pk('user', record['user']),
+        author_id=lookups.pk('user', record['author']),
+    )
+
+
+def _after_posts(batch):
+    scopes, group_ids = {'index'}, set()
+    for post in batch:
+        scopes.update((f'post:{post.pk}', f'profile:{post.author_id}'))
+        if post.group_id:
+            scopes.add(f'group:{post.group_id}')
+            group_ids.add(post.group_id)
+    bump(*scopes)
+    forget_snapshots(group_ids)
+    get_backend().index_many(POST, batch)
+
+
+def _after_comments(batch):
+    bump(*{f'comments:{comment.post_id}' for comment in batch})
+    get_backend().index_many(COMMENT, batch)
+
+
+def _after_follows(batch):
+    # Без точного счетчика посты авторов с FANOUT_MAX_FOLLOWERS
+    # подписчиков и больше разошлись бы по всем лентам.
+    recount_follower_counts({follow.author_id for follow in batch})
+    backfill_timelines(
+        (follow.user_id, follow.author_id) for follow in batch)
+    bump(*{f'follows:{follow.user_id}' for follow in batch})
+
+
+AFTER_BATCH = {
+    'post': _after_posts,
+    'comment': _after_comments,
+    'follow': _after_follows,
+}
+# Модели, которые загружаются со своими id: в непустую таблицу
+# их не загрузить, ведь комментарии ссылаются на посты по id.
+KEEP_IDS = ('post', 'comment')
+
+
+def import_records(records, batch_size=BATCH_SIZE, report=print):
+    """Загружает пары (модель, запись) пачками bulk_create.
+
+    Записи одной модели должны идти подряд, как их пишет выгрузка.
+    Существующие пользователи, группы и подписки пропускаются. Посты
+    и комментарии сохраняют свои id, поэтому загружаются только в пустые
+    таблицы, иначе ValueError. Сигналы при bulk_create не срабатывают:
+    ленты сбрасываются, ленты подписок заполняются и посты с
+    комментариями индексируются для поиска по пачкам, а счетчики
+    пересчитываются в конце. Картинки постов ждут команды process_images.
+    """
+    lookups = Lookups()
+    dates = (
+        Post._meta.get_field('pub_date'), Comment._meta.get_field('created'))
+    with explicit_dates(*dates):
+        for model, group in groupby(records, key=itemgetter(0)):
+            if model not in MODEL_CLASSES:
+                raise ValueError(f'Неизвестная модель «{model}».')
+            if model in KEEP_IDS and MODEL_CLASSES[model].objects.exists():
+                raise ValueError(
+                    f'Таблица {model} не пуста: записи со своими id '
+                    f'загружаются только в пустую таблицу.')
+            objects = (_build(model, record, lookups) for _, record in group)
+            insert_batches(
+                MODEL_CLASSES[model], objects, batch_size, report,
+                on_batch=AFTER_BATCH.get(model), ignore_conflicts=True,
+            )
+            if model in Lookups.sources:
+                lookups.reset(model)
+    recount_post_counters()
+    recompute_trending()
+    pending = Post.objects.filter(image_status=IMAGE_PENDING).count()
+    if pending:
+        report(f'Картинок ждут обработки: {pending}. '
+               f'Запустите manage.py process_images.')
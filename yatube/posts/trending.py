@@ -0,0 +1,206 @@
+"""Лента популярного.
+
+Рейтинг поста - сумма весов событий: публикации, которая весит тем
+больше, чем больше у автора подписчиков, и комментариев. Вес каждого
+события затухает вдвое за HALF_LIFE. Чтобы не пересчитывать все
+рейтинги со временем, вес события умножается на
+2 ** ((t - EPOCH) / HALF_LIFE): порядок постов от этого тот же, а новое
+событие просто прибавляется к сумме. Хранится двоичный логарифм суммы,
+чтобы числа не переполнялись.
+
+Первые TOP_SIZE постов лежат в кеше списком (рейтинг, id), и страница
+ленты берет его одним ключом.
+"""
+import math
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.sqlite_backend.base import read_only
+from .bulk import capped_batch_size
+from .models import AuthorStats, Comment, Post, TrendingScore
+
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE = 60 * 60 * 6
+COMMENT_WEIGHT = 1.0
+# Публикация весит REACH_WEIGHT * log2(2 + число подписчиков автора).
+REACH_WEIGHT = 1.0
+# События старше окна при пересчете не учитываются: их вес затух.
+WINDOW = timedelta(days=7)
+TOP_SIZE = 100
+TOP_KEY = 'trending:top'
+RECOMPUTE_BATCH_SIZE = 1000
+
+
+def boost(weight, at):
+    """Логарифм веса события в момент at, приведенного к EPOCH."""
+    return math.log2(weight) + (at - EPOCH).total_seconds() / HALF_LIFE
+
+
+def log_add(first, second):
+    """log2(2 ** first + 2 ** second) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def publication_weight(follower_count):
+    return REACH_WEIGHT * math.log2(2 + follower_count)
+
+
+def rebuild_top():
+    """Перестраивает список лучших постов в кеше по таблице рейтингов."""
+    top = list(
+        TrendingScore.objects.order_by('-score')
+        .values_list('score', 'post_id')[:TOP_SIZE]
+    )
+    cache.set(TOP_KEY, top, None)
+    return top
+
+
+def _offer(post_id, score):
+    """Обновляет место поста в кешированном списке лучших.
+
+    Параллельные обновления могут затереть друг друга; список
+    выравнивается при следующем пересчете.
+    """
+    top = cache.get(TOP_KEY)
+    if top is None:
+        return
+    top = [entry for entry in top if entry[1] != post_id]
+    if len(top) >= TOP_SIZE and score <= top[-1][0]:
+        return
+    top.append((score, post_id))
+    top.sort(reverse=True)
+    cache.set(TOP_KEY, top[:TOP_SIZE], None)
+
+
+def forget_post(post_id):
+    """Убирает удаленный пост из кешированного списка лучших."""
+    def forget():
+        top = cache.get(TOP_KEY)
+        if top is not None and any(entry[1] == post_id for entry in top):
+            cache.set(
+                TOP_KEY, [entry for entry in top if entry[1] != post_id],
+                None)
+
+    transaction.on_commit(forget)
+
+
+def add_event(post_id, weight, at):
+    """Прибавляет к рейтингу поста событие с весом weight."""
+    value = boost(weight, at)
+    with transaction.atomic():
+        entry, created = (
+            TrendingScore.objects.select_for_update()
+            .get_or_create(post_id=post_id, defaults={'score': value})
+        )
+        if not created:
+            entry.score = log_add(entry.score, value)
+            entry.save(update_fields=('score',))
+    transaction.on_commit(lambda: _offer(post_id, entry.score))
+
+
+def rank_post(post):
+    """Начальный рейтинг нового поста по охвату автора."""
+    follower_count = (
+        AuthorStats.objects.filter(author_id=post.author_id)
+        .values_list('follower_count', flat=True).first()
+    )
+    add_event(
+        post.pk, publication_weight(follower_count or 0), post.pub_date)
+
+
+def rank_comment(comment):
+    add_event(comment.post_id, COMMENT_WEIGHT, comment.created)
+
+
+def _store_scores(scores, batch_size, report):
+    """Записывает рейтинги пачками, каждую в своей короткой транзакции."""
+    items = list(scores.items())
+    started = perf_counter()
+    for start in range(0, len(items), batch_size):
+        batch = [
+            TrendingScore(post_id=post_id, score=score)
+            for post_id, score in items[start:start + batch_size]
+        ]
+        with transaction.atomic():
+            existing = set(
+                TrendingScore.objects.filter(
+                    post_id__in=[entry.post_id for entry in batch])
+                .values_list('post_id', flat=True)
+            )
+            updated = [entry for entry in batch if entry.post_id in existing]
+            created = [
+                entry for entry in batch if entry.post_id not in existing]
+            TrendingScore.objects.bulk_update(
+                updated, ['score'], batch_size=batch_size)
+            TrendingScore.objects.bulk_create(
+                created,
+                batch_size=capped_batch_size(
+                    TrendingScore, created, batch_size),
+                ignore_conflicts=True,
+            )
+    elapsed = perf_counter() - started
+    report(f'TrendingScore: {len(items)} строк, '
+           f'{len(items) / elapsed if elapsed else 0:.0f} строк/с')
+
+
+def _delete_stale(scores, batch_size):
+    """Удаляет рейтинги постов, у которых за окно не осталось событий."""
+    stale = [
+        post_id for post_id in
+        TrendingScore.objects.values_list('post_id', flat=True).iterator()
+        if post_id not in scores
+    ]
+    for start in range(0, len(stale), batch_size):
+        TrendingScore.objects.filter(
+            post_id__in=stale[start:start + batch_size]).delete()
+
+
+def recompute(batch_size=RECOMPUTE_BATCH_SIZE, report=None):
+    """Пересчитывает рейтинги по постам и комментариям за WINDOW.
+
+    События читаются одним снимком без очереди писателей, а рейтинги
+    пишутся пачками: запись не блокирует остальные на весь пересчет.
+    Возвращает число постов с рейтингом.
+    """
+    since = timezone.now() - WINDOW
+    scores = {}
+
+    def add(post_id, value):
+        old = scores.get(post_id)
+        scores[post_id] = value if old is None else log_add(old, value)
+
+    with read_only():
+        posts = Post.objects.filter(
+            Q(pub_date__gte=since) | Q(comments__created__gte=since)
+        ).distinct().values_list(
+            'pk', 'pub_date', 'author__stats__follower_count')
+        for post_id, pub_date, follower_count in posts.iterator():
+            add(post_id, boost(
+                publication_weight(follower_count or 0), pub_date))
+        comments = Comment.objects.filter(
+            created__gte=since).values_list('post_id', 'created')
+        for post_id, created in comments.iterator():
+            add(post_id, boost(COMMENT_WEIGHT, created))
+    _store_scores(scores, batch_size, report or (lambda message: None))
+    _delete_stale(scores, batch_size)
+    rebuild_top()
+    return len(scores)
+
+
+def top_ids():
+    """Id лучших постов по убыванию рейтинга."""
+    top = cache.get(TOP_KEY)
+    if top is None:
+        top = rebuild_top()
+    return [post_id for _, post_id in top]
+
+
+def trending_posts(post_ids):
+    """Посты для ленты в порядке post_ids; удаленные пропускаются."""
+    return Post.objects.for_feed().in_order(post_ids)
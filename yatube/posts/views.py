@@ -1,22 +1,37 @@
+from django.conf import settings
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
-from .models import Post, Group, User, Comment, Follow
+from django.db import IntegrityError, transaction
+from core import ratelimit
+from core.views import too_many_requests
+from .models import AuthorStats, Post, User, Follow
+from .comments import comments_page, serialize_comment
+from .conditional import (conditional_feed, group_scopes,
+                          post_detail_scopes, profile_scopes)
+from .feed_cache import feed_fragment
 from .forms import PostForm, CommentForm
-
-POSTS_ON_PAGE = 10
+from .group_feed import groups, snapshot_page
+from .images import enqueue_image, reset_image_info
+from .paginator import (PAGE_PARAM, POSTS_ON_PAGE, paginate,
+                        paginate_lazily)
+from .thumbnails import delete_thumbnails, prefetch_thumbnails
+from .timeline import TIMELINE_DATE, timeline_posts
+from .trending import top_ids, trending_posts
 
 
+@conditional_feed(lambda request: ['index'], html=True)
 def index(request):
     template = 'posts/index.html'
     title = 'Последние обновления на сайте'
-    posts_list = Post.objects.all()
-    paginator = Paginator(posts_list, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts_list = Post.objects.for_feed()
+    # Страница загружается, только если фрагмента ленты нет в кеше.
+    page_obj = paginate_lazily(request, posts_list, prefetch_thumbnails)
     context = {
         'title': title,
         'page_obj': page_obj,
+        'feed_fragment': feed_fragment(request, 'index'),
     }
     return render(request, template, context)
 
@@ -30,31 +45,38 @@ def group_list(request):
     return render(request, template, context)
 
 
+@conditional_feed(group_scopes, html=True)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts_list = Post.objects.filter(group=group).all()
-    paginator = Paginator(posts_list, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = groups.get(slug)
+    # Первые страницы - по снимку группы, дальше - запросом к БД.
+    page_obj = snapshot_page(request, group)
+    if page_obj is None:
+        posts_list = Post.objects.for_feed().filter(group=group)
+        page_obj = paginate_lazily(request, posts_list, prefetch_thumbnails)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_fragment': feed_fragment(request, 'group', group.pk),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_feed(profile_scopes, html=True)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts_list = Post.objects.filter(author=author).all()
-    paginator = Paginator(posts_list, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    post_count = paginator.count
-    following = User.is_authenticated and author.following.exists()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    posts_list = Post.objects.for_feed().filter(author=author)
+    page_obj = paginate_lazily(request, posts_list, prefetch_thumbnails)
+    post_count = AuthorStats.post_count_for(author)
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=author).exists()
+    )
     show_follow_btn = bool(request.user != author)
     context = {
         'author': author,
         'page_obj': page_obj,
+        'feed_fragment': feed_fragment(request, 'profile', author.pk),
         'post_count': post_count,
         'following': following,
         'show_follow_btn': show_follow_btn
@@ -62,12 +84,15 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_feed(post_detail_scopes, html=True)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id)
+    prefetch_thumbnails([post])
     post_preview = post.text[:30]
-    post_count = Post.objects.filter(author=post.author).count()
+    post_count = AuthorStats.post_count_for(post.author)
     form = PostForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
+    comments = comments_page(request, post)
     comment_form = CommentForm(request.POST or None)
     if post.author == request.user:
         is_author = True
@@ -80,11 +105,29 @@ def post_detail(request, post_id):
         'is_author': is_author,
         'form': form,
         'comments': comments,
+        'comments_fragment': feed_fragment(request, 'comments', post.pk),
         'comment_form': comment_form
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев: HTML-фрагмент или JSON."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = comments_page(request, post)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [serialize_comment(comment) for comment in comments],
+            'next_cursor': comments.next_cursor,
+        })
+    context = {
+        'post': post,
+        'comments': comments,
+        'comments_fragment': feed_fragment(request, 'comments', post.pk),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required()
 def post_create(request):
     form = PostForm(request.POST or None,
@@ -92,7 +135,9 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        reset_image_info(post)
         post.save()
+        enqueue_image(post)
         return redirect('posts:profile', username=post.author)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -102,13 +147,22 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
+    previous_image = post.image.name
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post
     )
     if form.is_valid():
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            reset_image_info(post)
         post.save()
+        if image_changed:
+            enqueue_image(post)
+            if previous_image:
+                transaction.on_commit(
+                    lambda: delete_thumbnails(previous_image))
         return redirect('posts:post_detail', post_id=post_id)
     return render(request,
                   'posts/create_post.html',
@@ -130,10 +184,9 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts_list, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts_list = timeline_posts(request.user)
+    page_obj = paginate(request, posts_list, date_field=TIMELINE_DATE)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
         'follow': True
@@ -141,22 +194,41 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+def trending(request):
+    """Популярные посты: список лучших берется из кеша одним ключом."""
+    page_obj = Paginator(top_ids(), POSTS_ON_PAGE).get_page(
+        request.GET.get(PAGE_PARAM))
+    page_obj.object_list = trending_posts(page_obj.object_list)
+    prefetch_thumbnails(page_obj)
+    context = {
+        'page_obj': page_obj,
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if (
-            Follow.objects.filter(author=author, user=request.user).exists()
-            or request.user == author
-    ):
-        return redirect('posts:profile', username=username)
-    Follow.objects.create(author=author, user=request.user)
+    if request.user != author and not request.user.follower.filter(
+            author=author).exists():
+        # Токен лимита берется только за новую подписку.
+        view_name = request.resolver_match.view_name
+        retry_after = ratelimit.check(
+            request, view_name, settings.RATE_LIMITS.get(view_name, {}))
+        if retry_after:
+            return too_many_requests(request, retry_after)
+        # Одновременную подписку отсекает ограничение unique_follow в БД.
+        try:
+            with transaction.atomic():
+                Follow.objects.create(author=author, user=request.user)
+        except IntegrityError:
+            pass
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=request.user, author=author)
-    if follow.exists():
-        follow.delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
@@ -0,0 +1,15 @@
+from .backends import get_backend
+
+ADMIN_SEARCH_LIMIT = 1000
+
+
+class SearchIndexAdminMixin:
+    """Поиск в списке объектов админки через поисковый индекс."""
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = get_backend().match_ids(
+            self.search_kind, search_term, ADMIN_SEARCH_LIMIT)
+        return queryset.filter(pk__in=ids), False
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_backend = None
+
+
+def get_backend():
+    """Возвращает экземпляр бэкенда из settings.SEARCH_BACKEND."""
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.SEARCH_BACKEND)()
+    return _backend
@@ -0,0 +1,70 @@
+import re
+
+from ..stemmer import stem
+
+POST = 'post'
+COMMENT = 'comment'
+WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Разбивает текст на слова и приводит их к основам."""
+    return [stem(word) for word in WORD.findall(text)]
+
+
+class SearchResults:
+    """Ленивый ранжированный список постов, пригодный для Paginator."""
+
+    def __init__(self, backend, query):
+        self.backend = backend
+        self.query = query
+
+    def count(self):
+        return self.backend.count_posts(self.query)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        from posts.models import Post
+
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        ids = self.backend.rank_posts(self.query, start, key.stop - start)
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class BaseSearchBackend:
+    """Интерфейс поискового индекса по постам и комментариям."""
+
+    def index(self, kind, obj):
+        """Добавляет или обновляет пост либо комментарий в индексе."""
+        raise NotImplementedError
+
+    def index_many(self, kind, objects):
+        for obj in objects:
+            self.index(kind, obj)
+
+    def remove(self, kind, pk):
+        """Удаляет пост либо комментарий из индекса."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def count_posts(self, query):
+        """Число постов, подходящих под запрос сами или комментариями."""
+        raise NotImplementedError
+
+    def rank_posts(self, query, offset, limit):
+        """pk подходящих постов по убыванию релевантности."""
+        raise NotImplementedError
+
+    def match_ids(self, kind, query, limit):
+        """pk подходящих объектов одного вида по убыванию релевантности."""
+        raise NotImplementedError
+
+    def search(self, query):
+        return SearchResults(self, query)
@@ -0,0 +1,41 @@
+from django.db.models import Q
+
+from .base import POST, BaseSearchBackend
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Поиск через LIKE без индекса: для СУБД без полнотекстового поиска."""
+
+    def index(self, kind, obj):
+        pass
+
+    def remove(self, kind, pk):
+        pass
+
+    def clear(self):
+        pass
+
+    def _posts(self, query):
+        from posts.models import Post
+
+        return Post.objects.filter(
+            Q(text__icontains=query) | Q(comments__text__icontains=query)
+        ).distinct() if query else Post.objects.none()
+
+    def count_posts(self, query):
+        return self._posts(query).count()
+
+    def rank_posts(self, query, offset, limit):
+        return list(
+            self._posts(query).values_list('pk', flat=True)
+            [offset:offset + limit]
+        )
+
+    def match_ids(self, kind, query, limit):
+        from posts.models import Comment, Post
+
+        model = Post if kind == POST else Comment
+        return list(
+            model.objects.filter(text__icontains=query)
+            .values_list('pk', flat=True)[:limit]
+        )
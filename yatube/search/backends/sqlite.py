@@ -0,0 +1,86 @@
+from django.db import connection
+
+from .base import COMMENT, POST, BaseSearchBackend, normalize
+
+TABLE = 'search_index'
+
+
+def _rowid(kind, pk):
+    """Посты и комментарии делят rowid: четные и нечетные."""
+    return pk * 2 + (kind == COMMENT)
+
+
+def _match_expression(query):
+    return ' AND '.join(f'"{word}"' for word in normalize(query))
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Индекс SQLite FTS5 с русскими основами слов."""
+
+    def _row(self, kind, obj):
+        post_id = obj.pk if kind == POST else obj.post_id
+        return (
+            _rowid(kind, obj.pk), ' '.join(normalize(obj.text)),
+            kind, post_id,
+        )
+
+    def index(self, kind, obj):
+        self.index_many(kind, [obj])
+
+    def index_many(self, kind, objects):
+        rows = [self._row(kind, obj) for obj in objects]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {TABLE} WHERE rowid = %s',
+                [(row[0],) for row in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, body, kind, post_id) '
+                'VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(kind, pk)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+    def count_posts(self, query):
+        match = _match_expression(query)
+        if not match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(DISTINCT post_id) FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s',
+                [match],
+            )
+            return cursor.fetchone()[0]
+
+    def rank_posts(self, query, offset, limit):
+        match = _match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM {TABLE} WHERE {TABLE} MATCH %s '
+                'GROUP BY post_id ORDER BY min(rank) LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def match_ids(self, kind, query, limit):
+        match = _match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                'AND kind = %s ORDER BY rank LIMIT %s',
+                [match, kind, limit],
+            )
+            return [row[0] // 2 for row in cursor.fetchall()]
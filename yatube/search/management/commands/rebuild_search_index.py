@@ -0,0 +1,47 @@
+from time import monotonic
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post
+from search.backends import get_backend
+from search.backends.base import COMMENT, POST
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько объектов индексировать за одну запись.',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        batch_size = options['batch_size']
+        started = monotonic()
+        with transaction.atomic():
+            backend.clear()
+            total = 0
+            for kind, objects in (
+                (POST, Post.objects.only('id', 'text')),
+                (COMMENT, Comment.objects.only('id', 'text', 'post_id')),
+            ):
+                batch = []
+                for obj in objects.order_by().iterator(chunk_size=batch_size):
+                    batch.append(obj)
+                    if len(batch) == batch_size:
+                        backend.index_many(kind, batch)
+                        total += len(batch)
+                        batch = []
+                backend.index_many(kind, batch)
+                total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано объектов: {total} '
+            f'за {monotonic() - started:.1f} с.'
+        ))
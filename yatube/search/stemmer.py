@@ -0,0 +1,79 @@
+"""Стеммер Портера (Snowball) для русского языка.
+
+Реализация алгоритма
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)'
+    r'|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = (
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому'
+    r'|их|ых|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))'
+ADJECTIVAL = re.compile(f'({PARTICIPLE})?{ADJECTIVE}')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло'
+    r'|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)'
+    r'|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием'
+    r'|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+I_ENDING = re.compile(r'и$')
+DERIVATIONAL = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+SOFT_SIGN = re.compile(r'ь$')
+CYRILLIC_WORD = re.compile(r'^[а-яё]+$')
+
+
+def _region_start(word, start):
+    """Начало области R: после первой согласной, следующей за гласной."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word):
+    """Возвращает основу русского слова в нижнем регистре."""
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC_WORD.match(word):
+        return word
+    rv_start = next(
+        (i + 1 for i, char in enumerate(word) if char in VOWELS), None)
+    if rv_start is None:
+        return word
+    r2_start = _region_start(word, _region_start(word, 0))
+    head, rv = word[:rv_start], word[rv_start:]
+
+    rv, removed = PERFECTIVE_GERUND.subn('', rv, 1)
+    if not removed:
+        rv = REFLEXIVE.sub('', rv, 1)
+        for ending in (ADJECTIVAL, VERB, NOUN):
+            rv, removed = ending.subn('', rv, 1)
+            if removed:
+                break
+
+    rv = I_ENDING.sub('', rv, 1)
+
+    match = DERIVATIONAL.search(rv)
+    if match and rv_start + match.start() >= r2_start:
+        rv = rv[:match.start()]
+
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        rv, removed = SUPERLATIVE.subn('', rv, 1)
+        if removed and rv.endswith('нн'):
+            rv = rv[:-1]
+        elif not removed:
+            rv = SOFT_SIGN.sub('', rv, 1)
+    return head + rv
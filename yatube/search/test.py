@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from io import StringIO
+
+from posts.models import Comment, Post
+from .backends import get_backend
+from .stemmer import stem
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='author')
+        self.books = Post.objects.create(
+            author=self.author, text='Читаю интересные книги по вечерам')
+        self.cats = Post.objects.create(
+            author=self.author, text='Коты спят весь день')
+        self.comment = Comment.objects.create(
+            author=self.author, post=self.cats, text='Обожаю книгу про котов')
+
+    def search(self, query):
+        response = self.guest_client.get(reverse('search:index'), {'q': query})
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_stemmer_reduces_word_forms(self):
+        """Формы слова сводятся к одной основе."""
+        self.assertEqual(stem('книги'), stem('книгой'))
+        self.assertEqual(stem('котов'), stem('Коты'))
+
+    def test_search_matches_posts_and_comments(self):
+        """Поиск находит посты по тексту и по комментариям с учетом форм."""
+        self.assertCountEqual(
+            self.search('книга'), [self.books.pk, self.cats.pk])
+        self.assertEqual(self.search('кот'), [self.cats.pk])
+        self.assertEqual(self.search('собака'), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении."""
+        self.comment.delete()
+        self.assertEqual(self.search('книга'), [self.books.pk])
+        self.books.text = 'Гуляю по вечерам'
+        self.books.save()
+        self.assertEqual(self.search('книга'), [])
+        self.cats.delete()
+        self.assertEqual(self.search('кот'), [])
+
+    def test_rebuild_command_restores_index(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        get_backend().clear()
+        self.assertEqual(self.search('книга'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertCountEqual(
+            self.search('книга'), [self.books.pk, self.cats.pk])
+
+    def test_admin_changelist_uses_index(self):
+        """Поиск в админке идет через индекс."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'книгами'})
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.books.pk],
+        )
+        response = client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'кот'})
+        self.assertEqual(
+            [comment.pk for comment in response.context['cl'].result_list],
+            [self.comment.pk],
+        )
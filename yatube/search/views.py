@@ -0,0 +1,16 @@
+from django.core.paginator import Paginator
+from django.shortcuts import render
+
+from posts.paginator import POSTS_ON_PAGE
+from .backends import get_backend
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(get_backend().search(query), POSTS_ON_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'search/results.html', context)
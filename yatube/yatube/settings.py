@@ -10,10 +10,16 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Запуск тестов: manage.py test или pytest.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
 
 
 # Quick-start development settings - unsuitable for production
@@ -49,16 +55,22 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'search.apps.SearchConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -69,7 +81,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.ProfilingDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -90,12 +102,44 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединения живут CONN_MAX_AGE секунд и переиспользуются запросами
+# одного потока. DATABASE_REPLICA - путь к копии БД для чтения.
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 60))
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.sqlite_backend',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
     }
 }
+if os.environ.get('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DATABASE_REPLICA'],
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+# Настройки каждого нового соединения с основной БД (core.sqlite_backend).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 64 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ, а не в страницах.
+    'cache_size': -16 * 1024,
+    'busy_timeout': 5000,
+}
+# Сколько раз повторить захват заблокированной БД перед ошибкой.
+SQLITE_WRITE_RETRIES = 3
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# Представления, которые могут читать с реплик.
+DATABASE_REPLICA_VIEWS = (
+    'posts:index', 'posts:group', 'posts:profile', 'posts:post_detail',
+    'posts:comments', 'posts:follow_index', 'posts:trending',
+    'about:author', 'about:tech',
+)
+# Сколько секунд после записи клиент читает из основной БД.
+DATABASE_REPLICA_LAG = 5
 
 
 # Password validation
@@ -141,8 +185,16 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в очередь, отправляет их send_queued_mail через
+# EMAIL_QUEUE_BACKEND (для SMTP - EMAIL_HOST и EMAIL_PORT).
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_QUEUE_BACKEND = os.environ.get(
+    'EMAIL_QUEUE_BACKEND', 'django.core.mail.backends.filebased.EmailBackend')
+EMAIL_QUEUE_RETRY_DELAY = 60
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
@@ -150,10 +202,117 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_STORE = os.path.join(BASE_DIR, 'profiling.ndjson')
+# Хранилище больше этого размера откладывается в PROFILING_STORE.1.
+PROFILING_STORE_MAX_BYTES = 10 * 1024 * 1024
+
+# Загрузки пишутся во временный файл, а не держатся в памяти.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 50_000_000
+# Картинки постов уменьшаются до этой стороны и пересохраняются в
+# IMAGE_UPLOAD_FORMAT (None - в исходном формате).
+IMAGE_MAX_SIDE = 2048
+IMAGE_UPLOAD_FORMAT = 'WEBP'
+IMAGE_UPLOAD_QUALITY = 85
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedThumbnailBackend'
+# Потоки для фоновых задач: обработки картинок, миниатюр и заполнения
+# лент подписок; 0 - выполнять в запросе. В тестах - в запросе: они
+# удаляют временный MEDIA_ROOT сразу после себя, а общий кеш SQLite
+# тестовой БД в памяти отвечает потокам 'table is locked'.
+BACKGROUND_WORKERS = 0 if TESTING else 2
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Лимиты запросов к пишущим представлениям: корзина токенов на
+# пользователя и на IP. '10/m' - 10 запросов подряд, дальше по одному
+# раз в 6 секунд. methods - какие методы считаются, по умолчанию
+# пишущие. Подписка меняет данные и по GET, поэтому токен берет само
+# представление и только за новую подписку.
+RATE_LIMITS = {
+    'posts:post_create': {'user': '10/m', 'ip': '30/m'},
+    'posts:add_comment': {'user': '20/m', 'ip': '60/m'},
+    'posts:profile_follow': {'user': '30/m', 'ip': '60/m', 'methods': ()},
+    'users:signup': {'ip': '5/h'},
+}
+
+# Сколько секунд прокси и браузеры гостей могут отдавать ленты без
+# перепроверки.
+HTML_CACHE_MAX_AGE = 10
+# Сколько секунд хранить страницы для гостей, 0 - не кешировать.
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+SEARCH_BACKEND = 'search.backends.sqlite.SQLiteFTSBackend'
+
+# CACHE_MODE: locmem (по умолчанию, свой кеш у каждого процесса), file,
+# sqlite или remote - общий кеш (у file incr() не атомарен между
+# процессами), tiered - память процесса поверх общего
+# кеша, выбранного в CACHE_SHARED.
+CACHE_MODE = os.environ.get('CACHE_MODE', 'locmem')
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+CACHE_SHARED = os.environ.get('CACHE_SHARED', 'sqlite')
+shared_caches = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache'),
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache.sqlite3'),
+    },
+    'remote': {
+        'BACKEND': os.environ.get(
+            'CACHE_REMOTE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache',
+        ),
+        'LOCATION': CACHE_LOCATION or '127.0.0.1:11211',
+    },
+}
+if CACHE_MODE == 'tiered':
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.TieredCache',
+            'OPTIONS': {'SHARED': 'shared'},
+        },
+        'shared': shared_caches[CACHE_SHARED],
     }
+elif CACHE_MODE in shared_caches:
+    CACHES = {'default': shared_caches[CACHE_MODE]}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Кеш с корзинами лимитов запросов: общий для процессов и с атомарным
+# incr(). В режиме tiered - мимо локального уровня: каждое incr() там
+# пишет в журнал инвалидаций. При кеше в памяти процесса и файловом кеше
+# корзины лежат в своем файле SQLite.
+rate_limit_cache = {
+    'BACKEND': 'core.cache_backends.SQLiteCache',
+    'LOCATION': os.environ.get(
+        'RATE_LIMIT_CACHE_LOCATION',
+        os.path.join(BASE_DIR, 'ratelimit.sqlite3'),
+    ),
 }
+if TESTING:
+    # У запуска тестов свои корзины: токены прошлых запусков живут
+    # в общем файле до часа.
+    test_cache_dir = tempfile.mkdtemp(prefix='yatube-ratelimit-')
+    atexit.register(shutil.rmtree, test_cache_dir, ignore_errors=True)
+    rate_limit_cache['LOCATION'] = os.path.join(
+        test_cache_dir, 'ratelimit.sqlite3')
+    RATE_LIMIT_CACHE = 'ratelimit'
+elif CACHE_MODE == 'tiered' and CACHE_SHARED != 'file':
+    RATE_LIMIT_CACHE = 'shared'
+elif CACHE_MODE in ('sqlite', 'remote'):
+    RATE_LIMIT_CACHE = 'default'
+else:
+    RATE_LIMIT_CACHE = 'ratelimit'
+if RATE_LIMIT_CACHE == 'ratelimit':
+    CACHES[RATE_LIMIT_CACHE] = rate_limit_cache